@@ -1,7 +1,6 @@
 from tkinter import Toplevel, Label, Scale, HORIZONTAL, Button, LEFT
-from image_properties import ImageProperties
+import dataclasses
 import cv2
-import time
 import numpy as np
 
 
@@ -63,7 +62,9 @@ class AdvancedEditorTools(Toplevel):
         self.blur_scale.pack()
         self.blur_label.pack()
 
-        if self.master.master.image_properties.is_grayscaled == False:
+        # Gray images have no hue or saturation, unless sepia colors them
+        is_color = self.master.master.original_image.ndim == 3 or self.master.master.image_properties.is_sepia
+        if self.master.master.image_properties.is_grayscaled == False and is_color:
             self.hue_scale.pack()
             self.hue_label.pack()
             self.saturation_scale.pack()
@@ -78,85 +79,13 @@ class AdvancedEditorTools(Toplevel):
         """
         Sets pre-image properties based on the master's image properties.
         """
-        self.pre_image_properties = ImageProperties(
-            title=self.master.master.image_properties.title,
-            time=self.master.master.image_properties.time,
-            is_flipped_horz=self.master.master.image_properties.is_flipped_horz,
-            is_flipped_vert=self.master.master.image_properties.is_flipped_vert,
-            is_grayscaled=self.master.master.image_properties.is_grayscaled,
-            is_sepia=self.master.master.image_properties.is_sepia,
-            is_cropped=self.master.master.image_properties.is_cropped,
-            is_zoomed=self.master.master.image_properties.is_zoomed,
-            is_resized=self.master.master.image_properties.is_resized,
-            original_image_height=self.master.master.image_properties.original_image_height,
-            original_image_width=self.master.master.image_properties.original_image_width,
-            altered_image_height=self.master.master.image_properties.altered_image_height,
-            altered_image_width=self.master.master.image_properties.altered_image_width,
-            resize_image_height=self.master.master.image_properties.resize_image_height,
-            resize_image_width=self.master.master.image_properties.resize_image_width,
-            zoom_scale_factor=self.master.master.image_properties.zoom_scale_factor,
-            rotation=self.master.master.image_properties.rotation,
-            brightness=self.master.master.image_properties.brightness,
-            contrast=self.master.master.image_properties.contrast,
-            saturation=self.master.master.image_properties.saturation,
-            blur=self.master.master.image_properties.blur,
-            hue=self.master.master.image_properties.hue,
-            crop_start_x=self.master.master.image_properties.crop_start_x,
-            crop_start_y=self.master.master.image_properties.crop_start_y,
-            crop_end_x=self.master.master.image_properties.crop_end_x,
-            crop_end_y=self.master.master.image_properties.crop_end_y,
-            crop_ratio=self.master.master.image_properties.crop_ratio,
-            crop_rectangle_height=self.master.master.image_properties.crop_rectangle_height,
-            crop_rectangle_width=self.master.master.image_properties.crop_rectangle_width,
-            pan_start_x=self.master.master.image_properties.pan_start_x,
-            pan_start_y=self.master.master.image_properties.pan_start_y,
-            pan_coord_x=self.master.master.image_properties.pan_coord_x,
-            pan_coord_y=self.master.master.image_properties.pan_coord_y,
-            at_time_canvas_height=self.master.master.image_properties.at_time_canvas_height,
-            at_time_canvas_width=self.master.master.image_properties.at_time_canvas_width
-        )
+        self.pre_image_properties = dataclasses.replace(self.master.master.image_properties)
 
     def _set_current_image_properties(self):
         """
         Sets current image properties based on the master's image properties.
         """
-        self.current_image_properties = ImageProperties(
-            title=self.master.master.image_properties.title,
-            time=self.master.master.image_properties.time,
-            is_flipped_horz=self.master.master.image_properties.is_flipped_horz,
-            is_flipped_vert=self.master.master.image_properties.is_flipped_vert,
-            is_grayscaled=self.master.master.image_properties.is_grayscaled,
-            is_sepia=self.master.master.image_properties.is_sepia,
-            is_cropped=self.master.master.image_properties.is_cropped,
-            is_zoomed=self.master.master.image_properties.is_zoomed,
-            is_resized=self.master.master.image_properties.is_resized,
-            original_image_height=self.master.master.image_properties.original_image_height,
-            original_image_width=self.master.master.image_properties.original_image_width,
-            altered_image_height=self.master.master.image_properties.altered_image_height,
-            altered_image_width=self.master.master.image_properties.altered_image_width,
-            resize_image_height=self.master.master.image_properties.resize_image_height,
-            resize_image_width=self.master.master.image_properties.resize_image_width,
-            zoom_scale_factor=self.master.master.image_properties.zoom_scale_factor,
-            rotation=self.master.master.image_properties.rotation,
-            brightness=self.master.master.image_properties.brightness,
-            contrast=self.master.master.image_properties.contrast,
-            saturation=self.master.master.image_properties.saturation,
-            blur=self.master.master.image_properties.blur,
-            hue=self.master.master.image_properties.hue,
-            crop_start_x=self.master.master.image_properties.crop_start_x,
-            crop_start_y=self.master.master.image_properties.crop_start_y,
-            crop_end_x=self.master.master.image_properties.crop_end_x,
-            crop_end_y=self.master.master.image_properties.crop_end_y,
-            crop_ratio=self.master.master.image_properties.crop_ratio,
-            crop_rectangle_height=self.master.master.image_properties.crop_rectangle_height,
-            crop_rectangle_width=self.master.master.image_properties.crop_rectangle_width,
-            pan_start_x=self.master.master.image_properties.pan_start_x,
-            pan_start_y=self.master.master.image_properties.pan_start_y,
-            pan_coord_x=self.master.master.image_properties.pan_coord_x,
-            pan_coord_y=self.master.master.image_properties.pan_coord_y,
-            at_time_canvas_height=self.master.master.image_properties.at_time_canvas_height,
-            at_time_canvas_width=self.master.master.image_properties.at_time_canvas_width
-        )
+        self.current_image_properties = dataclasses.replace(self.master.master.image_properties)
 
     def _change_blur_value(self, event):
         """
@@ -200,6 +129,8 @@ class AdvancedEditorTools(Toplevel):
         Updates the master's image properties with the current image properties and inserts the edit instance into the history array.
         """
         self.master.master.image_properties = self.current_image_properties
+        # The sliders only rendered previews, render the full resolution image
+        self.master.master.image_viewer._apply_all_edits()
         self._insert_into_history()
         self.destroy()
 
@@ -218,7 +149,7 @@ class AdvancedEditorTools(Toplevel):
         Resets the image properties to the pre-image properties and updates the displayed image. Closes the popup.
         """
         self._reset_advanced_image_properties()
-        self.update_displayed_image()
+        self.update_displayed_image(preview=False)
         self.destroy()
 
     def _clear_edits_to_image(self, event):
@@ -251,17 +182,20 @@ class AdvancedEditorTools(Toplevel):
         self.saturation_scale.set(
             self.master.master.image_properties.saturation * 100)
 
-    def update_displayed_image(self):
+    def update_displayed_image(self, preview=True):
         """
         Updates the displayed image based on if the processed image is being displayed or not.
+
+        Parameters:
+            preview (bool): If True, a preview sized to the viewport is rendered instead of the full resolution image.
         """
         if self.displaying_processed_image:
             self.master.master.image_properties = self.current_image_properties
-            self.master.master.image_viewer._apply_all_edits()
+            self.master.master.image_viewer._apply_all_edits(preview=preview)
             return
         else:
             self.master.master.image_properties = self.pre_image_properties
-            self.master.master.image_viewer._apply_all_edits()
+            self.master.master.image_viewer._apply_all_edits(preview=preview)
             return
 
     def _check_undo_performed(self):
@@ -277,53 +211,7 @@ class AdvancedEditorTools(Toplevel):
         """
 
         title = f"Advanced Edits Applied"
-        edit_instance = self._make_edit_instance(title)
         self._check_undo_performed()
-        self.history_arr = self.master.master.history
-        self.history_arr.append(edit_instance)
+        self.master.master.history.record(self.master.master.image_properties, title)
         self.master.master.history_of_edits.update_history_list()
         self.master.master.history_of_edits._set_indices()
-
-    def _make_edit_instance(self, title):
-        """
-        Creates an edit instance with the current self.master.master.image_properties values.
-
-        Args:
-            title (str): The title of the edit instance.
-
-        Returns:
-            edit_instance (ImageProperties): The edit instance with the current self.master.master.image_properties values.
-        """
-        edit_instance = ImageProperties(
-            title=title,
-            time=str(time.strftime('%H:%M:%S')),
-            is_flipped_horz=self.master.master.image_properties.is_flipped_horz,
-            is_flipped_vert=self.master.master.image_properties.is_flipped_vert,
-            is_grayscaled=self.master.master.image_properties.is_grayscaled,
-            is_sepia=self.master.master.image_properties.is_sepia,
-            is_cropped=self.master.master.image_properties.is_cropped,
-            is_resized=self.master.master.image_properties.is_resized,
-            original_image_height=self.master.master.image_properties.original_image_height,
-            original_image_width=self.master.master.image_properties.original_image_width,
-            altered_image_height=self.master.master.image_properties.altered_image_height,
-            altered_image_width=self.master.master.image_properties.altered_image_width,
-            resize_image_height=self.master.master.image_properties.resize_image_height,
-            resize_image_width=self.master.master.image_properties.resize_image_width,
-            zoom_scale_factor=self.master.master.image_properties.zoom_scale_factor,
-            rotation=self.master.master.image_properties.rotation,
-            brightness=self.master.master.image_properties.brightness,
-            contrast=self.master.master.image_properties.contrast,
-            saturation=self.master.master.image_properties.saturation,
-            blur=self.master.master.image_properties.blur,
-            hue=self.master.master.image_properties.hue,
-            crop_start_x=self.master.master.image_properties.crop_start_x,
-            crop_start_y=self.master.master.image_properties.crop_start_y,
-            crop_end_x=self.master.master.image_properties.crop_end_x,
-            crop_end_y=self.master.master.image_properties.crop_end_y,
-            crop_ratio=self.master.master.image_properties.crop_ratio,
-            crop_rectangle_height=self.master.master.image_properties.crop_rectangle_height,
-            crop_rectangle_width=self.master.master.image_properties.crop_rectangle_width,
-            at_time_canvas_height=self.master.master.image_properties.at_time_canvas_height,
-            at_time_canvas_width=self.master.master.image_properties.at_time_canvas_width
-        )
-        return edit_instance
@@ -1,13 +1,22 @@
 from tkinter import Frame, Button, END, LEFT, Menu, Toplevel, Text, ttk
 from file_manager import FileManager
 from image_properties import ImageProperties
-import cv2
-import time
+from progressive_loader import ProgressiveLoader
+from batch import BatchRenderer
+from batch_stream import BatchStream
+from batch_queue import BatchQueue
+from batch_manifest import BatchManifest
+from batch_output import ArchiveOutput, DirectoryOutput
+import dataclasses
 import os
+import sqlite3
 from PIL import Image
 import numpy as np
 
 class AppOptions(Frame):
+    # Files a batch writes between flushes to the disk, so a failure loses little on slow network drives
+    BATCH_FSYNC_EVERY = 64
+
     def __init__(self, master=None):
         Frame.__init__(self, master=master, bg="#6b6b6b")
 
@@ -73,7 +82,7 @@ class AppOptions(Frame):
                 "Redo edits by clicking the redo button on the homepage or using the keyboard shortcut Shift+Ctrl+Z.",
 
             "Batch Processing":
-                "Initiate batch processing by selecting \"Edit\" -> \"Batch Processing\" and choosing the files you want to apply the edits to.",
+                "Initiate batch processing by selecting \"Edit\" -> \"Batch Processing\" and choosing the files you want to apply the edits to. The edited images can overwrite the files, or be written to a folder or a single archive.",
 
             "Zoom":
                 "Effortlessly zoom in and out using your trackpad or by holding down the 'Ctrl' key and pressing '+' or '-'.",
@@ -134,6 +143,11 @@ class AppOptions(Frame):
             self, text="Help", command=self._show_help_menu)
         self.help_button.pack(side="left")
 
+        # Shows large images reduced first and swaps in the full resolution once it is decoded
+        self.loader = ProgressiveLoader(self, self._swap_in_full_image)
+        # Runs batch jobs off the Tk thread, one after another
+        self.batch_queue = BatchQueue(self, AppOptions._run_batch, self._batch_finished)
+
     def convert_index_to_end(self, index):
         """
         Converts an index to the end of the line
@@ -230,18 +244,31 @@ class AppOptions(Frame):
         if fm.file is not None:
             self.my_file = fm.file
             self.master.file_location = fm.file
-            image = cv2.imread(fm.file)
-            self.master.master.original_image = image.copy()
-            self.master.master.processed_image = image.copy()
+            # Large images come back reduced and are swapped for the full resolution once it is decoded.
+            # Everything is measured against the full resolution image in the meantime.
+            image_viewer = self.master.master.image_viewer
+            image, shape = self.loader.load(fm.file, image_viewer.winfo_width(), image_viewer.winfo_height())
+            if image is None:
+                print(f"Error: Could not read {fm.file}")
+                return
+            self.master.master.original_image = image
+            self.master.master.processed_image = image
+            image_viewer.processed_scale = image.shape[1] / shape[1]
             self.master.master.image_properties = ImageProperties()
-            self._set_dimensions_of_image(image)
+            self._set_dimensions_of_image(image, shape)
             self.master.master.history_of_edits._clear_history()
-            self._insert_into_history(image)
-            self.master.master.image_viewer._reset()
-            self.master.master.image_viewer.display_image(image)
+            self._insert_into_history(image, shape)
+            image_viewer._reset()
             self._update_metadata()
             self._update_app_title()
 
+    def _swap_in_full_image(self, img=None):
+        """
+        Replaces the reduced image shown while loading with the full resolution image and renders the edits made meanwhile.
+        """
+        self.master.master.original_image = img
+        self.master.master.image_viewer._apply_all_edits()
+
     def bytes_per_pixel(self, image):
         """
         Calculates the bytes per pixel of an image (color depth)
@@ -293,12 +320,16 @@ class AppOptions(Frame):
                 int(resolution[1] * self.master.master.image_viewer.scale_factor))
         self.master.master.editor_options.update_metadata_labels(file_size, resolution, file_name, file_extension, bytes_per_pixel, zoom_resolution)
 
-    def _set_dimensions_of_image(self, img=None):
+    def _set_dimensions_of_image(self, img=None, shape=None):
         """
         Sets the dimensions of the image when imported
+
+        Parameters:
+            img (numpy.ndarray): The imported image
+            shape (tuple): The shape of the full resolution image, if img is reduced while it loads
         """
         image = img
-        height, width = image.shape[:2]
+        height, width = (shape or image.shape)[:2]
         self.master.master.image_properties.original_image_height = height
         self.master.master.image_properties.original_image_width = width
         self.master.master.image_properties.altered_image_height = height
@@ -317,6 +348,9 @@ class AppOptions(Frame):
         fm.find_file(path)
 
         if fm.file is not None:
+            # Make sure the full resolution image is loaded and the newest edits have finished rendering
+            self.loader.flush()
+            self.master.master.image_viewer.render_scheduler.flush()
             fm.save_file(self.master.master.processed_image)
             self.master.master.is_saved = True
 
@@ -329,6 +363,9 @@ class AppOptions(Frame):
         fm.find_file(path)
 
         if fm.file is not None:
+            # Make sure the full resolution image is loaded and the newest edits have finished rendering
+            self.loader.flush()
+            self.master.master.image_viewer.render_scheduler.flush()
             fm.save_as_file(self.master.master.processed_image)
             self.master.master.is_saved = True
 
@@ -339,62 +376,65 @@ class AppOptions(Frame):
         fm = FileManager()
         fm.get_files()
 
-        if fm.batch_files is not None:
-            for i in fm.batch_files:
-                self.master.file_location = i
-                image = cv2.imread(i)
-                if image is None: # image failed to be read
-                    print(f"Corrupt image at {i}\n")
-                    continue
+        if fm.batch_files:
+            fm.get_batch_output()
+        if fm.batch_files and fm.batch_output is not None:
+            # The files are edited with the current edits, read, edited and written side by side in the background.
+            # Batch edits never resized, each image keeps its own size.
+            recipe = dataclasses.replace(self.master.master.image_properties, is_resized=False)
+            kind, path = fm.batch_output
+            renderer = BatchRenderer(recipe, path if kind == "folder" else None,
+                                     input_root=BatchRenderer.common_root(fm.batch_files))
+            if kind == "archive":
+                output = ArchiveOutput(renderer, path, AppOptions.BATCH_FSYNC_EVERY)
+                self.batch_queue.submit(BatchStream(renderer, output=output), fm.batch_files, None)
+            else:
+                # The manifest remembers the files batches have edited, so running a batch again does not apply it twice
+                output = DirectoryOutput(renderer, AppOptions.BATCH_FSYNC_EVERY)
+                self.batch_queue.submit(BatchStream(renderer, output=output), fm.batch_files, BatchManifest.DEFAULT_PATH)
 
-                self.master.master.original_image = image.copy()
-                self.master.master.processed_image = image.copy()
-                self._set_dimensions_of_image(image)
+    @staticmethod
+    def _run_batch(stream=None, paths=None, manifest_path=None):
+        """
+        Runs a batch on the thread of the batch queue. The manifest is only opened for the batch and
+        closed once it finishes, a manifest that cannot be opened only means no file is skipped.
 
-                self.master.master.image_viewer._apply_all_edits()
+        Parameters:
+            stream (BatchStream): The batch to run.
+            paths (list): The paths to the input files.
+            manifest_path (str): The path to the manifest database, or None to run without one.
 
-                fm = FileManager()
-                path = self.master.file_location
-                fm.find_file(path)
+        Returns:
+            list: The results of BatchStream.run
+        """
+        if manifest_path is not None:
+            try:
+                stream.manifest = BatchManifest(manifest_path)
+            except sqlite3.Error as e:
+                print(f"Error: Could not open the batch manifest {manifest_path}: {e}")
+        try:
+            return stream.run(paths)
+        finally:
+            if stream.manifest is not None:
+                stream.manifest.close()
 
-                if fm.file is not None:
-                    fm.save_file(self.master.master.processed_image)
-                    self.master.master.is_saved = True
+    def _batch_finished(self, results=None):
+        """
+        Reports a finished batch. Files that failed were already reported by the batch.
+        """
+        failed = sum(1 for _, _, error in results if error is not None)
+        print(f"Batch processing finished, {len(results) - failed} of {len(results)} images saved")
 
-    def _insert_into_history(self, img=None):
+    def _insert_into_history(self, img=None, shape=None):
         """
-        Inserts the current image into the history array
+        Inserts the imported image into the history array
+
+        Parameters:
+            img (numpy.ndarray): The imported image
+            shape (tuple): The shape of the full resolution image, if img is reduced while it loads
         """
-        image = img
-        height, width = image.shape[:2]
-        title = "File Imported"
-        import_instance = ImageProperties(
-            title=title,
-            time=str(time.strftime('%H:%M:%S')),
-            is_flipped_horz=self.master.master.image_properties.is_flipped_horz,
-            is_flipped_vert=self.master.master.image_properties.is_flipped_vert,
-            is_grayscaled=self.master.master.image_properties.is_grayscaled,
-            is_sepia=self.master.master.image_properties.is_sepia,
-            is_cropped=self.master.master.image_properties.is_cropped,
-            original_image_height=height,
-            original_image_width=width,
-            altered_image_height=height,
-            altered_image_width=width,
-            resize_image_height=height,
-            resize_image_width=width,
-            rotation=self.master.master.image_properties.rotation,
-            brightness=self.master.master.image_properties.brightness,
-            contrast=self.master.master.image_properties.contrast,
-            saturation=self.master.master.image_properties.saturation,
-            blur=self.master.master.image_properties.blur,
-            hue=self.master.master.image_properties.hue,
-            crop_start_x=self.master.master.image_properties.crop_start_x,
-            crop_start_y=self.master.master.image_properties.crop_start_y,
-            crop_end_x=self.master.master.image_properties.crop_end_x,
-            crop_end_y=self.master.master.image_properties.crop_end_y,
-            crop_ratio=self.master.master.image_properties.crop_ratio
-        )
-        self.master.master.history.append(import_instance)
+        # The dimensions were already set from img and shape by _set_dimensions_of_image
+        self.master.master.history.record(self.master.master.image_properties, "File Imported")
         self.master.master.history_of_edits._set_indices()
         self.master.master.history_of_edits.update_history_list()
 
@@ -0,0 +1,266 @@
+import argparse
+import dataclasses
+import glob
+import hashlib
+import json
+import os
+import sys
+from edit_pipeline import EditPipeline
+from image_io import ImageIO
+from image_properties import ImageProperties
+
+
+class BatchRenderer:
+    def __init__(self, recipe=None, output_dir=None, extension=None, input_root=None):
+        """
+        Renders the edits of a recipe onto image files and writes the results to an output directory.
+
+        Parameters:
+            recipe (ImageProperties): The edits to apply.
+            output_dir (str): The directory the edited images are written to, None writes over each input file.
+            extension (str): Extension of the written files, such as ".png". None keeps the extension of each input.
+            input_root (str): The folders below this directory are recreated in the output directory.
+                None writes every file straight into the output directory.
+        """
+        self.recipe = recipe if recipe is not None else ImageProperties()
+        self.output_dir = output_dir
+        self.extension = extension
+        self.input_root = input_root
+        self.edit_pipeline = EditPipeline(fuse=True)
+
+    @staticmethod
+    def load_recipe(path=None, overrides=()):
+        """
+        Reads a recipe from a JSON file of ImageProperties fields and applies field=value overrides on top.
+
+        Parameters:
+            path (str): The path to the JSON file, or None to start from the default properties.
+            overrides (list): "field=value" strings.
+
+        Returns:
+            ImageProperties: The recipe
+        """
+        values = {}
+        if path is not None:
+            with open(path) as recipe_file:
+                values = json.load(recipe_file)
+
+        fields = {field.name: field.type for field in dataclasses.fields(ImageProperties)}
+        for override in overrides:
+            name, _, value = override.partition("=")
+            values[name.strip()] = value.strip()
+
+        unknown = [name for name in values if name not in fields]
+        if unknown:
+            raise ValueError(f"Unknown recipe fields: {', '.join(unknown)}")
+
+        recipe = ImageProperties()
+        for name, value in values.items():
+            setattr(recipe, name, BatchRenderer._convert(value, fields[name]))
+        return recipe
+
+    @staticmethod
+    def _convert(value=None, field_type=str):
+        """
+        Converts a recipe value to the type of its field. Strings from the command line are parsed.
+        """
+        if field_type is bool or field_type == "bool":
+            if isinstance(value, str):
+                return value.lower() in ("1", "true", "yes", "on")
+            return bool(value)
+        if field_type is int or field_type == "int":
+            return int(float(value))
+        if field_type is float or field_type == "float":
+            return float(value)
+        return str(value)
+
+    @staticmethod
+    def expand_inputs(patterns=None):
+        """
+        Expands paths, directories and glob patterns into the image files they name, in order and without repeats.
+        Directories are searched along with every folder below them, and ** in a pattern matches any number of folders.
+
+        Parameters:
+            patterns (list): Paths, directories or glob patterns.
+
+        Returns:
+            list: The paths of the image files
+        """
+        paths = []
+        for pattern in patterns:
+            matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+            for match in matches:
+                if not os.path.isdir(match):
+                    paths.append(match)
+                    continue
+                for directory, folders, names in os.walk(match):
+                    # Walked in sorted order, so the files come out the same on every system
+                    folders.sort()
+                    paths.extend(os.path.join(directory, name) for name in sorted(names)
+                                 if ImageIO.is_supported(name))
+
+        seen = set()
+        return [path for path in paths if not (path in seen or seen.add(path))]
+
+    @staticmethod
+    def common_root(paths=None):
+        """
+        Returns the deepest directory holding every one of the files and directories.
+        """
+        return os.path.commonpath([os.path.abspath(path) if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+                                   for path in paths])
+
+    def properties_for(self, shape=None):
+        """
+        Returns a copy of the recipe sized for an image of the given shape. Images are only resized
+        when the recipe asks for it, otherwise the resize dimensions follow the image.
+
+        Parameters:
+            shape (tuple): The shape of the image
+
+        Returns:
+            ImageProperties: The properties to render the image with
+        """
+        height, width = shape[:2]
+        image_properties = dataclasses.replace(self.recipe)
+        image_properties.original_image_height = height
+        image_properties.original_image_width = width
+        image_properties.altered_image_height = height
+        image_properties.altered_image_width = width
+        if not image_properties.is_resized:
+            image_properties.resize_image_height = height
+            image_properties.resize_image_width = width
+        return image_properties
+
+    def recipe_hash(self):
+        """
+        Returns a hash of everything that decides how a file is rendered: the recipe, with the
+        dimensions every file sets for itself left out, and the output format.
+
+        Returns:
+            str: The SHA-256 as hex
+        """
+        values = dataclasses.asdict(self.properties_for((0, 0)))
+        del values["title"], values["time"]
+        values["extension"] = self.extension
+        return hashlib.sha256(json.dumps(values, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def relative_path(self, path=None):
+        """
+        Returns the path of the edited copy of an input file relative to the output directory,
+        keeping the folders it has below the input root.
+        """
+        if self.input_root is not None:
+            relative = os.path.relpath(os.path.abspath(path), self.input_root)
+        else:
+            relative = os.path.basename(path)
+        name, extension = os.path.splitext(relative)
+        return name + (self.extension or extension)
+
+    def output_path(self, path=None):
+        """
+        Returns where the edited copy of an input file is written.
+        """
+        if self.output_dir is None:
+            name, extension = os.path.splitext(path)
+            return name + (self.extension or extension)
+        return os.path.join(self.output_dir, self.relative_path(path))
+
+    def decode(self, path=None):
+        """
+        Reads an input file.
+
+        Returns:
+            numpy.ndarray: The image, or None if it could not be read
+        """
+        return ImageIO.read_image(path)
+
+    def process(self, img=None):
+        """
+        Applies the recipe to an image.
+
+        Returns:
+            numpy.ndarray: The edited image
+        """
+        image = self.edit_pipeline.run(self.properties_for(img.shape), img)
+        # Every file is different, the cached steps would only hold on to memory
+        self.edit_pipeline.clear()
+        return image
+
+    def encode(self, path=None, img=None):
+        """
+        Writes an edited image, creating its folder if needed.
+
+        Returns:
+            bool: True if the file was written
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return ImageIO.write_image(path, img)
+
+
+def main(argv=None):
+    """
+    Command line entry point. Returns the process exit code, 1 if any file failed.
+    """
+    parser = argparse.ArgumentParser(prog="batch", description="Apply the same edits to many images without a display.")
+    parser.add_argument("inputs", nargs="+", help="image files, directories or glob patterns")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("-o", "--output-dir",
+                        help="directory the edited images are written to, keeping the folders below the inputs")
+    output.add_argument("-a", "--archive", help="tar or zip file the edited images are written into")
+    parser.add_argument("-r", "--recipe", help="JSON file of ImageProperties fields")
+    parser.add_argument("-s", "--set", action="append", default=[], metavar="FIELD=VALUE",
+                        help="set a recipe field, may be repeated")
+    parser.add_argument("-f", "--format", help="write every image in this format, such as png")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="number of processes applying the edits, defaults to one per available core")
+    parser.add_argument("--decoders", type=int, default=0, help="number of threads reading files")
+    parser.add_argument("--encoders", type=int, default=0, help="number of threads writing files")
+    parser.add_argument("-m", "--manifest",
+                        help="database recording finished files, files it shows are up to date are skipped")
+    parser.add_argument("--fsync-every", type=int, default=0, metavar="N",
+                        help="flush the output to the disk after every N images, by default it is left to the system")
+    args = parser.parse_args(argv)
+
+    try:
+        recipe = BatchRenderer.load_recipe(args.recipe, args.set)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    paths = BatchRenderer.expand_inputs(args.inputs)
+    if not paths:
+        parser.error("no input images found")
+
+    extension = "." + args.format.lstrip(".").lower() if args.format else None
+    if extension is not None and extension not in ImageIO.EXTENSIONS:
+        parser.error(f"unsupported format {args.format}")
+    # Imported here as batch_stream imports this module
+    from batch_stream import BatchStream
+    from batch_manifest import BatchManifest
+    from batch_output import ArchiveOutput, DirectoryOutput
+    if args.archive is not None and not ArchiveOutput.is_archive(args.archive):
+        parser.error("the archive must be a .tar or .zip file")
+    if args.archive is not None and args.manifest is not None:
+        parser.error("an archive is written whole every time, it can not be used with a manifest")
+    # A directory given as input is mirrored whole, even if all of its images are in one folder below it
+    directories = [path for path in args.inputs if os.path.isdir(path)]
+    renderer = BatchRenderer(recipe, args.output_dir, extension, BatchRenderer.common_root(paths + directories))
+    if args.archive is not None:
+        output = ArchiveOutput(renderer, args.archive, args.fsync_every)
+    else:
+        output = DirectoryOutput(renderer, args.fsync_every)
+    manifest = BatchManifest(args.manifest) if args.manifest else None
+    stream = BatchStream(renderer, args.decoders, args.jobs, args.encoders, manifest=manifest, output=output)
+    try:
+        results = stream.run(paths)
+    finally:
+        if manifest is not None:
+            manifest.close()
+    failed = sum(1 for _, _, error in results if error is not None)
+    print(f"{len(results) - failed} of {len(results)} images written to {args.archive or args.output_dir}"
+          + (f", {stream.skipped} were already up to date" if stream.skipped else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+
+class BatchManifest:
+    # Bytes read at a time while hashing a file
+    HASH_CHUNK = 1 << 20
+    # Where the editor keeps the manifest of its batches
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".image_editor_batch.sqlite")
+
+    def __init__(self, path=None):
+        """
+        Remembers which files a batch has produced, in an SQLite database. Each input file is recorded
+        with the hash of its contents, the hash of the recipe, the output file and whether it succeeded.
+        Files already produced from the same contents with the same recipe are skipped when a batch
+        is run again, so an interrupted batch carries on where it stopped and edits written over
+        their input are not applied twice.
+
+        Parameters:
+            path (str): The path to the database file, created if it does not exist.
+        """
+        self.path = path
+        self._lock = threading.Lock()  # The batch stages record from several threads
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # Every result is committed on its own, so a crash loses at most the files being written.
+        # In WAL mode with NORMAL syncing a commit does not wait for the disk.
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "input_path TEXT NOT NULL, recipe_hash TEXT NOT NULL, "
+            "input_hash TEXT, input_size INTEGER, input_mtime INTEGER, "
+            "output_path TEXT, output_hash TEXT, output_size INTEGER, output_mtime INTEGER, "
+            "status TEXT, error TEXT, "
+            "PRIMARY KEY (input_path, recipe_hash))")
+        self._connection.commit()
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def file_hash(path=None):
+        """
+        Returns the SHA-256 of a file's contents, as hex.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as hashed_file:
+            for chunk in iter(lambda: hashed_file.read(BatchManifest.HASH_CHUNK), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _stat(path=None):
+        """
+        Returns the (size, modification time in nanoseconds) of a file, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def fingerprint(self, path=None):
+        """
+        Returns the hash, size and modification time of an input file. A file with the size and
+        modification time it had when it was recorded is not read again, which is what makes
+        re-running a mostly unchanged folder quick.
+
+        Parameters:
+            path (str): The path to the input file.
+
+        Returns:
+            tuple: (hash of the file's contents, size, modification time in nanoseconds)
+        """
+        path = os.path.abspath(path)
+        stat = BatchManifest._stat(path)
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT input_hash, input_size, input_mtime, output_path, output_hash, output_size, output_mtime "
+                "FROM files WHERE input_path = ?", (path,)).fetchall()
+        for input_hash, input_size, input_mtime, output_path, output_hash, output_size, output_mtime in rows:
+            if stat == (input_size, input_mtime):
+                return input_hash, input_size, input_mtime
+            # Files edited in place now hold the output
+            if output_path == path and stat == (output_size, output_mtime):
+                return output_hash, output_size, output_mtime
+        return (BatchManifest.file_hash(path),) + stat
+
+    def is_done(self, path=None, recipe_hash="", input_hash="", output_path=None):
+        """
+        Returns the output path if the file was already produced from these contents with this recipe
+        and the output is still as it was written, otherwise None.
+
+        Parameters:
+            path (str): The path to the input file.
+            recipe_hash (str): The hash of the recipe.
+            input_hash (str): The hash of the input file's contents.
+            output_path (str): Where the file would be written now, a file written elsewhere does not count.
+                None accepts any output path.
+
+        Returns:
+            str: The output path, or None if the file has to be rendered
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT input_hash, output_path, output_hash, output_size, output_mtime, status "
+                "FROM files WHERE input_path = ? AND recipe_hash = ?", (path, recipe_hash)).fetchone()
+        if row is None:
+            return None
+        recorded_hash, recorded_path, output_hash, output_size, output_mtime, status = row
+        if status != "done":
+            return None
+        if output_path is not None and os.path.abspath(output_path) != recorded_path:
+            return None
+        output_path = recorded_path
+        if input_hash != recorded_hash and not (output_path == path and input_hash == output_hash):
+            return None
+        if BatchManifest._stat(output_path) != (output_size, output_mtime):
+            return None
+        return output_path
+
+    def record(self, path=None, recipe_hash="", fingerprint=None, output_path=None, error=None):
+        """
+        Records the result of rendering a file.
+
+        Parameters:
+            path (str): The path to the input file.
+            recipe_hash (str): The hash of the recipe.
+            fingerprint (tuple): The fingerprint() of the input file taken before it was rendered.
+            output_path (str): The path of the written file, None if it failed.
+            error (str): Why the file failed, None if it succeeded.
+
+        Returns:
+            None
+        """
+        path = os.path.abspath(path)
+        input_hash, input_size, input_mtime = fingerprint
+        status = "failed"
+        output_hash = None
+        output_size, output_mtime = None, None
+        if output_path is not None and error is None:
+            output_path = os.path.abspath(output_path)
+            # Only a file written over its input is looked up by its contents later, reading
+            # every other output back would double what a batch reads from the disk
+            if output_path == path:
+                output_hash = BatchManifest.file_hash(output_path)
+            output_size, output_mtime = BatchManifest._stat(output_path)
+            status = "done"
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, recipe_hash, input_hash, input_size, input_mtime,
+                 output_path, output_hash, output_size, output_mtime, status, error))
+            self._connection.commit()
@@ -0,0 +1,183 @@
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from image_io import ImageIO
+
+
+class DirectoryOutput:
+    def __init__(self, renderer=None, fsync_every=0):
+        """
+        Writes the edited images of a batch as files of their own, over the inputs or into the output
+        directory of the renderer, keeping the folders below its input root.
+
+        Parameters:
+            renderer (BatchRenderer): Decides where each file is written and writes it.
+            fsync_every (int): Number of files written between flushes to the disk, 0 leaves it to the system.
+                The files left over are flushed when the batch finishes.
+        """
+        self.renderer = renderer
+        self.fsync_every = fsync_every
+        self._lock = threading.Lock()  # Several encoders write at once
+        self._unsynced = []  # Files written since the last flush
+
+    def open(self):
+        """
+        Prepares for a batch.
+        """
+        self._unsynced = []
+        if self.renderer.output_dir is not None:
+            os.makedirs(self.renderer.output_dir, exist_ok=True)
+
+    def write(self, path=None, img=None):
+        """
+        Writes the edited copy of an input file.
+
+        Parameters:
+            path (str): The path to the input file.
+            img (numpy.ndarray): The edited image.
+
+        Returns:
+            str: The path of the written file
+
+        Raises:
+            IOError: If the file could not be written.
+        """
+        output_path = self.renderer.output_path(path)
+        if not self.renderer.encode(output_path, img):
+            raise IOError(f"Could not write {output_path}")
+
+        if self.fsync_every:
+            with self._lock:
+                self._unsynced.append(output_path)
+                if len(self._unsynced) < self.fsync_every:
+                    return output_path
+                unsynced, self._unsynced = self._unsynced, []
+            DirectoryOutput._sync(unsynced)
+        return output_path
+
+    def close(self):
+        """
+        Flushes the files that are still waiting for it.
+        """
+        with self._lock:
+            unsynced, self._unsynced = self._unsynced, []
+        DirectoryOutput._sync(unsynced)
+
+    @staticmethod
+    def _sync(paths=()):
+        """
+        Flushes files, and the folders that list them, to the disk.
+        """
+        directories = {os.path.dirname(os.path.abspath(path)) for path in paths}
+        # Folders can only be opened for flushing on POSIX systems
+        for path in list(paths) + (sorted(directories) if os.name == "posix" else []):
+            descriptor = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+
+
+class ArchiveOutput:
+    # Archive formats, by extension
+    EXTENSIONS = (".tar", ".zip")
+
+    def __init__(self, renderer=None, path=None, fsync_every=0):
+        """
+        Writes the edited images of a batch into one tar or zip archive, one after another. Images are
+        encoded by the encoders side by side and only adding them to the archive takes turns, so the
+        archive is written from start to end in large sequential writes.
+
+        Parameters:
+            renderer (BatchRenderer): Decides the name and format of each file in the archive.
+            path (str): The path to the archive, ending in .tar or .zip. An existing archive is replaced.
+            fsync_every (int): Number of files added between flushes to the disk, 0 leaves it to the system.
+                The archive is flushed when the batch finishes.
+        """
+        self.renderer = renderer
+        self.path = path
+        self.fsync_every = fsync_every
+        self._lock = threading.Lock()  # Only one file is added at a time
+        self._file = None
+        self._archive = None
+        self._added = 0
+
+    @staticmethod
+    def is_archive(path=None):
+        """
+        Returns True if the path names an archive format batches can be written to.
+        """
+        return os.path.splitext(path)[1].lower() in ArchiveOutput.EXTENSIONS
+
+    def open(self):
+        """
+        Creates the archive for a batch.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._added = 0
+        if self.path.lower().endswith(".zip"):
+            # Images are compressed already, they are stored as they are
+            self._archive = zipfile.ZipFile(self._file, "w", zipfile.ZIP_STORED)
+        else:
+            self._archive = tarfile.open(fileobj=self._file, mode="w")
+
+    def write(self, path=None, img=None):
+        """
+        Encodes the edited copy of an input file and adds it to the archive.
+
+        Parameters:
+            path (str): The path to the input file.
+            img (numpy.ndarray): The edited image.
+
+        Returns:
+            str: The path of the file in the archive, joined to the path of the archive
+
+        Raises:
+            IOError: If the image could not be encoded.
+        """
+        # Archives always use / between folders
+        name = self.renderer.relative_path(path).replace(os.sep, "/")
+        data = ImageIO.encode_image(os.path.splitext(name)[1], img)
+        if data is None:
+            raise IOError(f"Could not encode {name}")
+
+        with self._lock:
+            if isinstance(self._archive, zipfile.ZipFile):
+                self._archive.writestr(zipfile.ZipInfo(name, time.localtime()[:6]), data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                self._archive.addfile(info, io.BytesIO(data))
+            self._added += 1
+            if self.fsync_every and self._added % self.fsync_every == 0:
+                self._sync()
+        return os.path.join(self.path, name)
+
+    def close(self):
+        """
+        Finishes the archive and flushes it to the disk.
+        """
+        with self._lock:
+            if self._archive is None:
+                return
+            try:
+                self._archive.close()
+                self._sync()
+            finally:
+                self._file.close()
+                self._archive = None
+                self._file = None
+
+    def _sync(self):
+        """
+        Flushes what was written of the archive to the disk.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
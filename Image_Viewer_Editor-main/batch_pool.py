@@ -0,0 +1,171 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from batch import BatchRenderer
+from color_lut import ColorLUT
+from edit_planner import EditPlanner
+from tile_executor import TileExecutor
+
+# Set in each worker process by BatchPool._start_worker
+_renderer = None
+_shared_tables = []  # SharedMemory blocks the worker's tables live in, kept open for the life of the worker
+
+
+class BatchPool:
+    def __init__(self, renderer=None, workers=None):
+        """
+        A pool of processes applying the recipe of a BatchRenderer, one image per process at a time.
+        Color lookup tables for the recipe are compiled once and shared with the workers through
+        shared memory, instead of every worker compiling its own 64 MB copy. Images go to the workers
+        and back through shared memory as well, rather than being pickled through a pipe.
+
+        Parameters:
+            renderer (BatchRenderer): The recipe and output settings to render with.
+            workers (int): Number of processes. Defaults to the number of cores this process may use.
+        """
+        self.renderer = renderer
+        self.workers = workers or BatchPool.available_cores()
+        self._blocks = []  # Shared memory holding the tables while a pool is running
+
+    @staticmethod
+    def available_cores():
+        """
+        Returns the number of cores this process may run on.
+        """
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count() or 1
+
+    def compile_tables(self):
+        """
+        Compiles the color lookup tables the recipe's plans use, for color and for gray images.
+
+        Returns:
+            list: (key, ColorLUT) for each table
+        """
+        tables = {}
+        for shape in ((2, 2, 3), (2, 2)):
+            plan = EditPlanner.plan(self.renderer.properties_for(shape), shape, fuse=False)
+            for run in EditPlanner.color_runs(plan.ops):
+                key = tuple(op.key for op in run)
+                if key not in tables:
+                    tables[key] = ColorLUT.compile(run, self.renderer.properties_for(shape))
+        return list(tables.items())
+
+    @staticmethod
+    def _share_tables(tables=None):
+        """
+        Copies each table into a shared memory block.
+
+        Returns:
+            tuple: The SharedMemory blocks, and (key, block name, shape, dtype, title) describing each table
+        """
+        blocks = []
+        descriptions = []
+        for key, lut in tables:
+            block = shared_memory.SharedMemory(create=True, size=max(1, lut.table.nbytes))
+            np.ndarray(lut.table.shape, dtype=lut.table.dtype, buffer=block.buf)[...] = lut.table
+            blocks.append(block)
+            descriptions.append((key, block.name, lut.table.shape, lut.table.dtype.str, lut.title))
+        return blocks, descriptions
+
+    @staticmethod
+    def _start_worker(recipe=None, output_dir=None, extension=None, input_root=None, descriptions=()):
+        """
+        Sets up a worker process: its own renderer, the shared tables, and one thread for everything,
+        since the pool already keeps every core busy.
+        """
+        global _renderer
+        cv2.setNumThreads(1)
+        TileExecutor._shared = TileExecutor(workers=1)
+        _renderer = BatchRenderer(recipe, output_dir, extension, input_root)
+
+        for key, name, shape, dtype, title in descriptions:
+            block = shared_memory.SharedMemory(name=name)
+            _shared_tables.append(block)
+            table = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            ColorLUT.install(key, ColorLUT(table, title=title))
+
+    @staticmethod
+    def share_image(img=None):
+        """
+        Copies an image into a new shared memory block.
+
+        Returns:
+            tuple: The SharedMemory block, and (block name, shape, dtype) describing the image
+        """
+        block = shared_memory.SharedMemory(create=True, size=max(1, img.nbytes))
+        np.ndarray(img.shape, dtype=img.dtype, buffer=block.buf)[...] = img
+        return block, (block.name, img.shape, img.dtype.str)
+
+    @staticmethod
+    def take_image(description=None):
+        """
+        Copies an image out of the shared memory block share_image() made and frees the block.
+
+        Parameters:
+            description (tuple): (block name, shape, dtype) of the image
+
+        Returns:
+            numpy.ndarray: The image
+        """
+        name, shape, dtype = description
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf).copy()
+        finally:
+            block.close()
+            block.unlink()
+
+    @staticmethod
+    def _process_shared(description=None):
+        """
+        Applies the recipe to an image in shared memory, in a worker process. The caller frees the input block.
+
+        Returns:
+            tuple: (block name, shape, dtype) of the edited image, in a new block for the caller to take_image()
+        """
+        name, shape, dtype = description
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            # Copied out so nothing the edits keep can hold on to the block
+            image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf).copy()
+        finally:
+            block.close()
+        output, description = BatchPool.share_image(_renderer.process(image))
+        output.close()
+        return description
+
+    def start(self, workers=None):
+        """
+        Starts the worker processes with the shared tables.
+        Every started pool must be closed with stop().
+
+        Parameters:
+            workers (int): Number of processes, defaults to self.workers
+
+        Returns:
+            concurrent.futures.ProcessPoolExecutor: The pool
+        """
+        self._blocks, descriptions = BatchPool._share_tables(self.compile_tables())
+        # Workers are started fresh rather than forked, the editor window's threads and Tk state stay behind
+        context = multiprocessing.get_context("spawn")
+        initargs = (self.renderer.recipe, self.renderer.output_dir, self.renderer.extension,
+                    self.renderer.input_root, descriptions)
+        return ProcessPoolExecutor(max_workers=workers or self.workers, mp_context=context,
+                                   initializer=BatchPool._start_worker, initargs=initargs)
+
+    def stop(self, pool=None):
+        """
+        Waits for the workers of a pool from start() to finish and frees the shared tables.
+        """
+        try:
+            pool.shutdown(wait=True)
+        finally:
+            for block in self._blocks:
+                block.close()
+                block.unlink()
+            self._blocks = []
@@ -0,0 +1,84 @@
+import queue
+import threading
+
+
+class BatchQueue:
+    # How often the Tk thread checks for finished batches, in milliseconds
+    POLL_INTERVAL = 100
+
+    def __init__(self, widget=None, run=None, on_done=None):
+        """
+        Runs batch jobs one after another on a worker thread, in the order they were submitted.
+        Unlike RenderScheduler no job is ever replaced or dropped, every job runs and every result
+        is handed back.
+
+        Parameters:
+            widget (tkinter.Widget): Widget whose after() is used to hand results back to the Tk thread.
+            run (callable): Called on the worker thread with the submitted arguments, returns the result.
+            on_done (callable): Called on the Tk thread with the result of each job.
+        """
+        self.widget = widget
+        self.run = run
+        self.on_done = on_done
+
+        self._jobs = queue.Queue()  # Arguments of the jobs waiting to run
+        self._finished = queue.Queue()  # (result, error) of the jobs waiting to be handed back
+        self._outstanding = 0  # Jobs submitted but not handed back yet, only used on the Tk thread
+        self._polling = False
+
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def submit(self, *args):
+        """
+        Queues a batch job behind the ones already queued.
+
+        Parameters:
+            args: The arguments passed to the run function.
+
+        Returns:
+            None
+        """
+        self._outstanding += 1
+        self._jobs.put(args)
+        self._schedule_poll()
+
+    def _work(self):
+        """
+        Worker thread loop, runs the queued jobs in order.
+        """
+        while True:
+            args = self._jobs.get()
+            result = None
+            error = None
+            try:
+                result = self.run(*args)
+            except Exception as e:
+                error = e
+            self._finished.put((result, error))
+
+    def _schedule_poll(self):
+        """
+        Starts polling for results on the Tk thread if it is not already.
+        """
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        """
+        Runs on the Tk thread, hands over every finished result and keeps polling while jobs are outstanding.
+        """
+        self._polling = False
+        while True:
+            try:
+                result, error = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            if error is not None:
+                print(f"Error: Batch processing failed: {error}")
+            else:
+                self.on_done(result)
+        if self._outstanding:
+            self._schedule_poll()
@@ -0,0 +1,184 @@
+import queue
+import threading
+from batch_output import DirectoryOutput
+from batch_pool import BatchPool
+
+
+class BatchStream:
+    # Threads reading files, reading is mostly waiting on the disk
+    DECODERS = 4
+    # Threads writing files
+    ENCODERS = 2
+    # Files decoded ahead of the processing stage, and files between processing and writing
+    QUEUE_SIZE = 8
+
+    # Tells the next stage there is nothing more to come
+    _DONE = None
+
+    def __init__(self, renderer=None, decoders=None, processes=None, encoders=None, queue_size=None, manifest=None,
+                 output=None):
+        """
+        Runs a batch as three overlapping stages: threads decode files, processes apply the recipe
+        and threads encode the results. The stages are joined by bounded queues, so a slow stage holds
+        the others back and memory stays the same however many files there are.
+
+        Parameters:
+            renderer (BatchRenderer): The recipe and output settings to render with.
+            decoders (int): Number of decoding threads.
+            processes (int): Number of processes applying the recipe, defaults to one per available core.
+                With one, the recipe is applied in this process.
+            encoders (int): Number of encoding threads.
+            queue_size (int): Number of files each queue between stages holds.
+            manifest (BatchManifest): Records every result, files it already holds for the recipe are skipped.
+                Not for archives, which are written whole every time.
+            output (DirectoryOutput or ArchiveOutput): Where the edited images go,
+                defaults to the files the renderer names.
+        """
+        self.renderer = renderer
+        self.decoders = decoders or BatchStream.DECODERS
+        self.processes = processes or BatchPool.available_cores()
+        self.encoders = encoders or BatchStream.ENCODERS
+        self.queue_size = queue_size or BatchStream.QUEUE_SIZE
+        self.manifest = manifest
+        self.output = output if output is not None else DirectoryOutput(renderer)
+        self.skipped = 0  # Files of the last run the manifest showed were already produced
+
+    def run(self, paths=None):
+        """
+        Renders every file, carrying on past files that fail.
+
+        Parameters:
+            paths (list): The paths of the input files.
+
+        Returns:
+            list: (input path, output path, error message) for each file in the order given,
+                the output path is None when it failed
+        """
+        paths = list(paths)
+        results = [None] * len(paths)
+        self.skipped = 0
+        if not paths:
+            return results
+
+        recipe_hash = self.renderer.recipe_hash()
+        fingerprints = [None] * len(paths)  # Taken before each file is rendered, for the manifest
+        skipped_lock = threading.Lock()
+
+        # Decoded images wait here for the processing stage
+        decoded = queue.Queue(self.queue_size)
+        # Processed images wait here for the encoders. Its size is bounded by the slots instead,
+        # since results arrive from the pool's own thread, which must never block
+        processed = queue.Queue()
+        processes = min(self.processes, len(paths))
+        # One slot for every image that is being processed or waiting to be written. Every process
+        # gets an image of its own on top of the backlog, so no process waits on a full backlog
+        slots = threading.BoundedSemaphore(processes + self.queue_size)
+
+        indices = iter(range(len(paths)))
+        indices_lock = threading.Lock()
+
+        def decode():
+            while True:
+                with indices_lock:
+                    index = next(indices, None)
+                if index is None:
+                    return
+                image, error = None, None
+                try:
+                    if self.manifest is not None:
+                        fingerprints[index] = self.manifest.fingerprint(paths[index])
+                        output_path = self.manifest.is_done(paths[index], recipe_hash, fingerprints[index][0],
+                                                            self.renderer.output_path(paths[index]))
+                        if output_path is not None:
+                            results[index] = (paths[index], output_path, None)
+                            with skipped_lock:
+                                self.skipped += 1
+                            continue
+                    image = self.renderer.decode(paths[index])
+                    if image is None:
+                        error = f"Corrupt image at {paths[index]}"
+                except Exception as e:
+                    error = str(e)
+                decoded.put((index, image, error))
+
+        def encode():
+            while True:
+                item = processed.get()
+                if item is BatchStream._DONE:
+                    return
+                index, image, error = item
+                output_path = None
+                if error is None:
+                    try:
+                        output_path = self.output.write(paths[index], image)
+                    except Exception as e:
+                        error = str(e)
+                if error is not None:
+                    print(f"Error: {error}")
+                    output_path = None
+                if self.manifest is not None and fingerprints[index] is not None:
+                    self.manifest.record(paths[index], recipe_hash, fingerprints[index], output_path, error)
+                results[index] = (paths[index], output_path, error)
+                slots.release()
+
+        def finish_decoding():
+            for thread in decode_threads:
+                thread.join()
+            decoded.put(BatchStream._DONE)
+
+        self.output.open()
+        decode_threads = [threading.Thread(target=decode, daemon=True) for _ in range(self.decoders)]
+        encode_threads = [threading.Thread(target=encode, daemon=True) for _ in range(self.encoders)]
+        for thread in decode_threads + encode_threads:
+            thread.start()
+        threading.Thread(target=finish_decoding, daemon=True).start()
+
+        pool = None
+        if processes > 1:
+            batch_pool = BatchPool(self.renderer, processes)
+            pool = batch_pool.start()
+        try:
+            while True:
+                item = decoded.get()
+                if item is BatchStream._DONE:
+                    break
+                index, image, error = item
+                slots.acquire()
+                if error is not None:
+                    processed.put((index, None, error))
+                elif pool is None:
+                    try:
+                        processed.put((index, self.renderer.process(image), None))
+                    except Exception as e:
+                        processed.put((index, None, str(e)))
+                else:
+                    block, description = BatchPool.share_image(image)
+                    del image
+                    future = pool.submit(BatchPool._process_shared, description)
+                    future.add_done_callback(
+                        lambda future, index=index, block=block: processed.put(
+                            BatchStream._finished(index, future, block)))
+        finally:
+            if pool is not None:
+                batch_pool.stop(pool)
+            for _ in encode_threads:
+                processed.put(BatchStream._DONE)
+            for thread in encode_threads:
+                thread.join()
+            self.output.close()
+        return results
+
+    @staticmethod
+    def _finished(index=0, future=None, block=None):
+        """
+        Frees the shared input of a finished processing job and returns its (index, image, error).
+        """
+        block.close()
+        block.unlink()
+        error = future.exception()
+        if error is not None:
+            return index, None, str(error)
+        try:
+            return index, BatchPool.take_image(future.result()), None
+        except Exception as e:
+            return index, None, str(e)
@@ -0,0 +1,111 @@
+import math
+import cv2
+
+
+class Blur:
+    # Number of box passes used to approximate a Gaussian
+    GAUSSIAN_PASSES = 3
+    # Largest kernel a preview blurs at its own size, larger kernels blur a downscaled copy
+    PREVIEW_MAX_KERNEL = 15
+
+    @staticmethod
+    def kernel_size(blur_value=0):
+        """
+        Returns the odd kernel size for a blur slider value.
+
+        Parameters:
+            blur_value (int): The blur slider value
+
+        Returns:
+            int: The kernel size, 1 for no blur
+        """
+        return max(1, int(blur_value) + 1 if int(blur_value) % 2 == 0 else int(blur_value))
+
+    @staticmethod
+    def box(img=None, kernel_size=1):
+        """
+        Applies a box blur. cv2.blur keeps running sums along each axis, so the cost per pixel
+        does not depend on the kernel size.
+
+        Parameters:
+            img (numpy.ndarray): The image to be blurred
+            kernel_size (int): The odd width and height of the box
+
+        Returns:
+            numpy.ndarray: The blurred image
+        """
+        if kernel_size <= 1:
+            return img
+        return cv2.blur(img, (kernel_size, kernel_size))
+
+    @staticmethod
+    def _box_sizes(sigma=1.0, passes=None):
+        """
+        Returns the odd box sizes whose repeated application has the variance of a Gaussian with the given sigma.
+        """
+        passes = passes or Blur.GAUSSIAN_PASSES
+        ideal = math.sqrt(12 * sigma * sigma / passes + 1)
+        lower = int(ideal)
+        if lower % 2 == 0:
+            lower -= 1
+        upper = lower + 2
+        # Number of passes using the smaller box so the variances add up to sigma squared
+        lower_passes = round((12 * sigma * sigma - passes * lower * lower - 4 * passes * lower - 3 * passes)
+                             / (-4 * lower - 4))
+        return [lower if index < lower_passes else upper for index in range(passes)]
+
+    @staticmethod
+    def gaussian(img=None, sigma=1.0, passes=None):
+        """
+        Approximates a Gaussian blur with stacked box blurs, so the cost does not depend on sigma
+        the way cv2.GaussianBlur does.
+
+        Parameters:
+            img (numpy.ndarray): The image to be blurred
+            sigma (float): Standard deviation of the Gaussian in pixels
+            passes (int): Number of box passes. Defaults to Blur.GAUSSIAN_PASSES.
+
+        Returns:
+            numpy.ndarray: The blurred image
+        """
+        image = img
+        for size in Blur._box_sizes(sigma, passes):
+            image = Blur.box(image, size)
+        return image
+
+    @staticmethod
+    def preview_factor(kernel_size=1):
+        """
+        Returns how many times a preview shrinks the image before blurring it with the kernel, 1 for not at all.
+        The image and kernel are halved until the kernel is about Blur.PREVIEW_MAX_KERNEL, powers of two
+        are what OpenCV shrinks fastest.
+        """
+        factor = 1
+        while kernel_size // (factor * 2) >= Blur.PREVIEW_MAX_KERNEL:
+            factor *= 2
+        return factor
+
+    @staticmethod
+    def box_downscaled(img=None, kernel_size=1, factor=1):
+        """
+        Approximates a box blur by blurring a copy shrunk by the factor and scaling it back up.
+        The large blur hides the detail lost by shrinking, which makes it fit for previews only.
+
+        Parameters:
+            img (numpy.ndarray): The image to be blurred
+            kernel_size (int): The odd width and height of the box, at the size of the image
+            factor (int): How many times the image is shrunk
+
+        Returns:
+            numpy.ndarray: The blurred image, the same size as the original
+        """
+        if factor <= 1:
+            return Blur.box(img, kernel_size)
+        height, width = img.shape[:2]
+        small = cv2.resize(img, (max(1, round(width / factor)), max(1, round(height / factor))),
+                           interpolation=cv2.INTER_AREA)
+        small_kernel = max(1, round(kernel_size / factor))
+        if small_kernel % 2 == 0:
+            small_kernel += 1
+        small = Blur.box(small, small_kernel)
+        return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
@@ -0,0 +1,303 @@
+from collections import OrderedDict
+import threading
+import cv2
+import numpy as np
+
+
+class ColorLUT:
+    # Number of entries in a full 3D table, one per 24-bit BGR color
+    COLORS = 1 << 24
+    # Lattice size used when exporting a 3D table
+    CUBE_SIZE = 33
+    # Number of pixels looked up at once, bounds the temporaries
+    BAND_PIXELS = 1 << 20
+    # Bytes of compiled tables kept for reuse, two 3D tables of 64 MB each. Per channel tables take 768 bytes
+    MEMORY_BUDGET = 128 << 20
+
+    _compiled = OrderedDict()
+    _compiled_lock = threading.Lock()
+    _building = {}  # A lock for each table being built, so callers wanting the same table wait for one build
+
+    def __init__(self, table=None, title=""):
+        """
+        A color lookup table that applies a chain of per-pixel color edits in a single pass.
+
+        Parameters:
+            table (numpy.ndarray): Either a (256, 3) uint8 table applied to each BGR channel separately,
+                or a (2 ** 24,) uint32 table holding the packed BGR output for every packed BGR input color.
+            title (str): Title written when the table is exported.
+        """
+        self.table = table
+        self.title = title
+
+    @property
+    def is_3d(self):
+        """
+        Returns True if the table maps colors rather than single channels.
+        """
+        return self.table.ndim == 1
+
+    @staticmethod
+    def _cache_key(ops=None):
+        """
+        Returns the key a compiled table for the operations is cached under.
+        """
+        return tuple(op.key for op in ops)
+
+    @staticmethod
+    def _pack(img):
+        """
+        Packs a BGR image into one uint32 per pixel (blue in the lowest byte).
+        """
+        image = cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)
+        image[:, :, 3] = 0
+        return image.view(np.uint32)[:, :, 0]
+
+    @staticmethod
+    def _unpack(packed):
+        """
+        Unpacks uint32 pixels made by ColorLUT._pack back into a BGR image.
+        """
+        image = packed.view(np.uint8).reshape(packed.shape + (4,))
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+    @staticmethod
+    def compile(ops=None, img_properties=None):
+        """
+        Builds a lookup table by running the color edits once over every possible color.
+        Tiles of one image ask for the same table at the same time, only the first builds it
+        and the others wait for it.
+
+        Parameters:
+            ops (list): The EditOperation instances to fuse, in order.
+            img_properties (ImageProperties): The image properties object passed to the operations.
+
+        Returns:
+            ColorLUT: The compiled table
+        """
+        key = ColorLUT._cache_key(ops)
+        with ColorLUT._compiled_lock:
+            if key in ColorLUT._compiled:
+                ColorLUT._compiled.move_to_end(key)
+                return ColorLUT._compiled[key]
+            build_lock = ColorLUT._building.setdefault(key, threading.Lock())
+
+        try:
+            with build_lock:
+                with ColorLUT._compiled_lock:
+                    if key in ColorLUT._compiled:
+                        ColorLUT._compiled.move_to_end(key)
+                        return ColorLUT._compiled[key]
+                lut = ColorLUT._build(ops, img_properties)
+                ColorLUT.install(key, lut)
+                return lut
+        finally:
+            with ColorLUT._compiled_lock:
+                if ColorLUT._building.get(key) is build_lock:
+                    del ColorLUT._building[key]
+
+    @staticmethod
+    def _build(ops=None, img_properties=None):
+        """
+        Runs the color edits over every possible color and returns the resulting table.
+        """
+        # Every 24-bit color laid out as a 4096x4096 image, in the same
+        # order as the packed pixel values
+        colors = np.arange(ColorLUT.COLORS, dtype=np.uint32)
+        image = np.ascontiguousarray(
+            colors.view(np.uint8).reshape(4096, 4096, 4)[:, :, :3])
+        for op in ops:
+            image = op.apply(img_properties, image)
+        table = ColorLUT._pack(image).reshape(-1)
+
+        return ColorLUT(table, title=" -> ".join(repr(op) for op in ops))
+
+    @staticmethod
+    def install(key=None, lut=None):
+        """
+        Adds a table compiled elsewhere, such as in another process, to the compiled tables.
+        The least recently used tables are dropped to stay within the memory budget, the newest is always kept.
+
+        Parameters:
+            key (tuple): The keys of the operations the table applies, as EditPlan.key gives them.
+            lut (ColorLUT): The table.
+
+        Returns:
+            None
+        """
+        with ColorLUT._compiled_lock:
+            ColorLUT._compiled[key] = lut
+            ColorLUT._compiled.move_to_end(key)
+            size = sum(table.table.nbytes for table in ColorLUT._compiled.values())
+            while size > ColorLUT.MEMORY_BUDGET and len(ColorLUT._compiled) > 1:
+                _, dropped = ColorLUT._compiled.popitem(last=False)
+                size -= dropped.table.nbytes
+
+    def apply(self, img=None):
+        """
+        Applies the table to the image.
+
+        Parameters:
+            img (numpy.ndarray): The BGR image to be edited
+
+        Returns:
+            numpy.ndarray: The edited image
+        """
+        image = img
+        if not self.is_3d:
+            if image.ndim == 2:
+                return cv2.LUT(image, np.ascontiguousarray(self.table[:, 0]))
+            return cv2.LUT(image, self.table.reshape(256, 1, 3))
+
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        height, width = image.shape[:2]
+        output = np.empty((height, width, 3), dtype=np.uint8)
+        band_rows = max(1, ColorLUT.BAND_PIXELS // max(1, width))
+        for start in range(0, height, band_rows):
+            packed = ColorLUT._pack(image[start:start + band_rows])
+            output[start:start + band_rows] = ColorLUT._unpack(
+                np.take(self.table, packed))
+        return output
+
+    @staticmethod
+    def from_lattice(lattice=None, title=""):
+        """
+        Builds a full table from a coarse 3D lattice using trilinear interpolation.
+
+        Parameters:
+            lattice (numpy.ndarray): An (N, N, N, 3) uint8 lattice indexed by [blue, green, red] holding BGR output values.
+            title (str): Title of the table.
+
+        Returns:
+            ColorLUT: The interpolated table
+        """
+        size = lattice.shape[0]
+        # Linear interpolation weights from the lattice points to all 256 values
+        position = np.arange(256) * (size - 1) / 255.0
+        lower = np.minimum(position.astype(np.int64), size - 2)
+        fraction = position - lower
+        weights = np.zeros((256, size), dtype=np.float32)
+        weights[np.arange(256), lower] = 1 - fraction
+        weights[np.arange(256), lower + 1] += fraction
+
+        values = lattice.astype(np.float32)
+        # [blue, green, red, c] -> [blue', green, red, c] -> [blue', green', red, c]
+        values = np.tensordot(weights, values, axes=(1, 0))
+        values = np.tensordot(weights, values, axes=(1, 1)).transpose(1, 0, 2, 3)
+        # The packed table is ordered [red, green, blue], so red is expanded last
+        values = values.transpose(2, 1, 0, 3).reshape(size, -1)
+
+        table = np.empty(ColorLUT.COLORS, dtype=np.uint32)
+        step = 16
+        for start in range(0, 256, step):
+            block = weights[start:start + step] @ values
+            block = np.clip(block + 0.5, 0, 255).astype(np.uint8)
+            block = block.reshape(-1, 256, 3)
+            table[start * 65536:(start + step) * 65536] = ColorLUT._pack(block).reshape(-1)
+        return ColorLUT(table, title=title)
+
+    def to_lattice(self, size=None):
+        """
+        Samples the table on a coarse 3D lattice.
+
+        Parameters:
+            size (int): Number of lattice points along each axis. Defaults to ColorLUT.CUBE_SIZE.
+
+        Returns:
+            numpy.ndarray: An (N, N, N, 3) uint8 lattice indexed by [blue, green, red] holding BGR output values
+        """
+        size = size or ColorLUT.CUBE_SIZE
+        values = np.round(np.linspace(0, 255, size)).astype(np.uint32)
+        if not self.is_3d:
+            table = self.table[values]
+            return np.stack(np.meshgrid(table[:, 0], table[:, 1], table[:, 2], indexing="ij"), axis=-1)
+        blue, green, red = np.meshgrid(values, values, values, indexing="ij")
+        packed = np.take(self.table, blue | (green << 8) | (red << 16))
+        return packed.view(np.uint8).reshape(size, size, size, 4)[:, :, :, :3]
+
+    def save_cube(self, path, size=None):
+        """
+        Exports the table as a .cube file.
+
+        Parameters:
+            path (str): The file to write.
+            size (int): Lattice size of an exported 3D table. Defaults to ColorLUT.CUBE_SIZE.
+
+        Returns:
+            None
+        """
+        lines = []
+        if self.title:
+            lines.append(f'TITLE "{self.title}"')
+        if self.is_3d:
+            lattice = self.to_lattice(size)
+            lines.append(f"LUT_3D_SIZE {lattice.shape[0]}")
+            # .cube lists RGB triplets with red changing fastest, which is the
+            # C order of a lattice indexed by [blue, green, red]
+            rows = lattice.reshape(-1, 3)[:, ::-1]
+        else:
+            lines.append("LUT_1D_SIZE 256")
+            rows = self.table[:, ::-1]
+        lines.append("DOMAIN_MIN 0.0 0.0 0.0")
+        lines.append("DOMAIN_MAX 1.0 1.0 1.0")
+        for red, green, blue in rows / 255.0:
+            lines.append(f"{red:.6f} {green:.6f} {blue:.6f}")
+
+        with open(path, "w") as cube_file:
+            cube_file.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def load_cube(path):
+        """
+        Imports a table from a .cube file.
+
+        Parameters:
+            path (str): The file to read.
+
+        Returns:
+            ColorLUT: The imported table
+        """
+        title = ""
+        size_3d = 0
+        size_1d = 0
+        domain_min = np.zeros(3)
+        domain_max = np.ones(3)
+        rows = []
+
+        with open(path, "r") as cube_file:
+            for line in cube_file:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                keyword = line.split()[0]
+                if keyword == "TITLE":
+                    title = line[len("TITLE"):].strip().strip('"')
+                elif keyword == "LUT_3D_SIZE":
+                    size_3d = int(line.split()[1])
+                elif keyword == "LUT_1D_SIZE":
+                    size_1d = int(line.split()[1])
+                elif keyword == "DOMAIN_MIN":
+                    domain_min = np.array(line.split()[1:4], dtype=np.float64)
+                elif keyword == "DOMAIN_MAX":
+                    domain_max = np.array(line.split()[1:4], dtype=np.float64)
+                else:
+                    rows.append(line.split()[:3])
+
+        values = (np.array(rows, dtype=np.float64) - domain_min) / (domain_max - domain_min)
+        values = np.clip(np.round(values * 255), 0, 255).astype(np.uint8)[:, ::-1]
+
+        if size_3d:
+            if len(values) != size_3d ** 3:
+                raise ValueError(f"Expected {size_3d ** 3} entries in {path}, found {len(values)}")
+            return ColorLUT.from_lattice(values.reshape(size_3d, size_3d, size_3d, 3), title=title)
+
+        if len(values) != size_1d:
+            raise ValueError(f"Expected {size_1d} entries in {path}, found {len(values)}")
+        if size_1d != 256:
+            # Resample to one entry per channel value so cv2.LUT can use it
+            samples = np.linspace(0, size_1d - 1, 256)
+            values = np.stack([np.interp(samples, np.arange(size_1d), values[:, channel])
+                               for channel in range(3)], axis=-1)
+            values = np.round(values).astype(np.uint8)
+        return ColorLUT(np.ascontiguousarray(values), title=title)
@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+
+
+class ColorMatrix:
+    # Sepia weights, applied to the channels in the order they are stored
+    SEPIA = ((0.272, 0.534, 0.131),
+             (0.349, 0.686, 0.168),
+             (0.393, 0.769, 0.189))
+    # Luma weights of a BGR pixel, the same ones cv2.COLOR_BGR2GRAY uses
+    GRAY = (0.114, 0.587, 0.299)
+
+    def __init__(self, matrix=None, offset=None):
+        """
+        A linear mix of the color channels, out[i] = sum(matrix[i][j] * in[j]) + offset[i].
+        Applied with cv2.transform, which mixes uint8 pixels in fixed point and saturates the result,
+        so no floating point copy of the image is made. Results are within one level of a float64 mix.
+
+        Parameters:
+            matrix (array-like): An (outputs, 3) matrix of channel weights, in BGR order.
+            offset (array-like): A value added to each output channel. Defaults to 0.
+        """
+        self.matrix = np.array(matrix, dtype=np.float32).reshape(-1, 3)
+        if offset is None:
+            offset = np.zeros(len(self.matrix))
+        self.offset = np.array(offset, dtype=np.float32).reshape(-1)
+
+    @staticmethod
+    def sepia():
+        """
+        Returns the sepia matrix.
+        """
+        return ColorMatrix(ColorMatrix.SEPIA)
+
+    @staticmethod
+    def grayscale_mix(weights=None, channels=1):
+        """
+        Returns a matrix mixing the channels into gray.
+
+        Parameters:
+            weights (tuple): The (blue, green, red) weights. Defaults to the luma weights.
+            channels (int): 1 for a single channel result, 3 for gray stored as BGR.
+
+        Returns:
+            ColorMatrix: The grayscale matrix
+        """
+        weights = weights if weights is not None else ColorMatrix.GRAY
+        return ColorMatrix([weights] * channels)
+
+    @staticmethod
+    def channel_mixer(blue=(1, 0, 0), green=(0, 1, 0), red=(0, 0, 1)):
+        """
+        Returns a matrix where each output channel is a mix of the input channels.
+
+        Parameters:
+            blue (tuple): The (blue, green, red) weights of the output blue channel
+            green (tuple): The (blue, green, red) weights of the output green channel
+            red (tuple): The (blue, green, red) weights of the output red channel
+
+        Returns:
+            ColorMatrix: The channel mixer
+        """
+        return ColorMatrix([blue, green, red])
+
+    def then(self, other=None):
+        """
+        Returns a single matrix doing this mix followed by the other, so both run in one pass.
+        Saturation between the two is lost, which only matters if the first mix goes out of range.
+
+        Parameters:
+            other (ColorMatrix): The mix applied second. Must take three channels.
+
+        Returns:
+            ColorMatrix: The combined matrix
+        """
+        matrix = other.matrix @ self.matrix
+        offset = other.matrix @ self.offset + other.offset
+        return ColorMatrix(matrix, offset)
+
+    def apply(self, img=None, truncate=False):
+        """
+        Applies the mix to the image.
+
+        Parameters:
+            img (numpy.ndarray): The BGR or single channel gray image to be edited
+            truncate (bool): If True, results are rounded down instead of to the nearest value.
+
+        Returns:
+            numpy.ndarray: The edited image, single channel if the matrix has one output
+        """
+        matrix = self.matrix
+        if img.ndim == 2:
+            # A gray pixel has the same value in every channel, so the weights of each output add up
+            matrix = matrix.sum(axis=1, keepdims=True)
+        offset = self.offset - 0.5 if truncate else self.offset
+        transform = np.hstack([matrix, offset.reshape(-1, 1)])
+        image = cv2.transform(img, transform)
+        if image.ndim == 3 and image.shape[2] == 1:
+            image = image[:, :, 0]
+        return image
+
+    def __repr__(self):
+        return f"ColorMatrix({self.matrix.tolist()}, offset={self.offset.tolist()})"
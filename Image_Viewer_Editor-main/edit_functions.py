@@ -1,6 +1,7 @@
-from PIL import Image
 import cv2
 import numpy as np
+from color_matrix import ColorMatrix
+from blur import Blur
 
 
 class AllEditFunctions:
@@ -18,12 +19,10 @@ class AllEditFunctions:
         """
         image_properties = img_properties
         image = img
-        image = Image.fromarray(image)
-
-        flipped_image = image.transpose(
-            method=Image.FLIP_LEFT_RIGHT) if image_properties.is_flipped_horz else image
-        numpy_image = np.array(flipped_image)
-        return numpy_image
+        if not image_properties.is_flipped_horz:
+            return image
+        # Reversing the columns gives a view, no pixels are copied
+        return image[:, ::-1]
 
     @staticmethod
     def _apply_vertical_flip_image(img_properties=None, img=None):
@@ -39,12 +38,10 @@ class AllEditFunctions:
         """
         image_properties = img_properties
         image = img
-        image = Image.fromarray(image)
-
-        flipped_image = image.transpose(
-            method=Image.FLIP_TOP_BOTTOM) if image_properties.is_flipped_vert else image
-        numpy_image = np.array(flipped_image)
-        return numpy_image
+        if not image_properties.is_flipped_vert:
+            return image
+        # Reversing the rows gives a view, no pixels are copied
+        return image[::-1]
 
     @staticmethod
     def _apply_grayscale_to_image(img_properties=None, img=None):
@@ -60,8 +57,9 @@ class AllEditFunctions:
         """
         image_properties = img_properties
         image = img
-        grayscale_image = cv2.cvtColor(
-            image, cv2.COLOR_BGR2GRAY) if image_properties.is_grayscaled else image
+        # Single channel images are gray already
+        grayscale_image = ColorMatrix.grayscale_mix().apply(
+            image) if image_properties.is_grayscaled and image.ndim == 3 else image
         return grayscale_image
 
     @staticmethod
@@ -81,13 +79,8 @@ class AllEditFunctions:
         sepia_image = image
 
         if image_properties.is_sepia:
-            array_image = np.array(image, dtype=np.float64)
-            sepia_filter = np.array([[0.272, 0.534, 0.131],
-                                     [0.349, 0.686, 0.168],
-                                     [0.393, 0.769, 0.189]])
-            sepia_image = np.dot(array_image, sepia_filter.T).clip(
-                0, 255).astype(np.uint8)
-            sepia_image = np.array(sepia_image, dtype=np.uint8)
+            # Mixed in fixed point straight on the uint8 pixels, within one level of a float64 mix
+            sepia_image = ColorMatrix.sepia().apply(image, truncate=True)
 
         return sepia_image
 
@@ -106,12 +99,28 @@ class AllEditFunctions:
         image_properties = img_properties
         image = img
         angle = image_properties.rotation
-        image = Image.fromarray(image)
+        AllEditFunctions._update_altered_dimensions(image_properties)
+        if angle % 360 == 0:
+            return image
 
-        rotated_image = image.rotate(
-            angle=angle, resample=Image.NEAREST, expand=True)
-        numpy_image = np.array(rotated_image)
+        # Rotates counter-clockwise as a strided view, no pixels are copied
+        numpy_image = np.rot90(image, (angle % 360) // 90)
 
+        return numpy_image
+
+    @staticmethod
+    def _update_altered_dimensions(img_properties=None):
+        """
+        Sets the altered image dimensions from the resize dimensions, swapping them if the image is rotated sideways
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+
+        Returns:
+            None
+        """
+        image_properties = img_properties
+        angle = image_properties.rotation
         resize_height = image_properties.resize_image_height
         resize_width = image_properties.resize_image_width
 
@@ -122,7 +131,29 @@ class AllEditFunctions:
             image_properties.altered_image_height = resize_height
             image_properties.altered_image_width = resize_width
 
-        return numpy_image
+    @staticmethod
+    def _apply_crop_to_image(img_properties=None, img=None):
+        """
+        Applies a crop to the image if the image_properties crop coordinates are set
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            img (numpy.ndarray): The image to be cropped
+
+        Returns:
+            numpy.ndarray: The cropped image
+        """
+        image_properties = img_properties
+        image = img
+        if image_properties.crop_start_x == 0 or image_properties.crop_start_y == 0 or image_properties.crop_end_x == 0 or image_properties.crop_end_y == 0:
+            return image
+
+        x = slice(int(image_properties.crop_start_x),
+                  int(image_properties.crop_end_x), 1)
+        y = slice(int(image_properties.crop_start_y),
+                  int(image_properties.crop_end_y), 1)
+
+        return image[y, x]
 
     @staticmethod
     def _apply_resize_to_image(img_properties=None, img=None):
@@ -207,14 +238,10 @@ class AllEditFunctions:
         """
         image_properties = img_properties
         image = img
-        blur_value = image_properties.blur
-        # this is how distorted each pixel will become
-        kernel_size = (blur_value, blur_value)
-        # the kernel size had to be a positive, ODD number
-        kernel_size = tuple(size + 1 if size %
-                            2 == 0 else size for size in kernel_size)
-        # applies the actual blur
-        image = cv2.blur(img, kernel_size)
+        # this is how distorted each pixel will become, the kernel size has to be a positive, ODD number
+        kernel_size = Blur.kernel_size(image_properties.blur)
+        # applies the actual blur, a 1x1 kernel leaves the image unchanged
+        image = Blur.box(image, kernel_size)
         return image
 
     @staticmethod
@@ -232,15 +259,7 @@ class AllEditFunctions:
         image_properties = img_properties
         image = img
         hue_value = AllEditFunctions._convert_hue(image_properties.hue)
-        # Convert image to HSV
-        hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        # Change the hue channel
-        # Hue values range from 0 to 179
-        hsv_image[:, :, 0] = (hsv_image[:, :, 0] + hue_value) % 180
-
-        # Convert back to BGR
-        image = cv2.cvtColor(hsv_image, cv2.COLOR_HSV2BGR)
-        return image
+        return AllEditFunctions._adjust_hsv(image, hue_value, 1)
 
     @staticmethod
     def _apply_saturation_to_image(img_properties=None, img=None):
@@ -258,15 +277,58 @@ class AllEditFunctions:
         image = img
         saturation_value = image_properties.saturation
         saturation_factor = 1 + saturation_value
+        return AllEditFunctions._adjust_hsv(image, 0, saturation_factor)
+
+    @staticmethod
+    def _apply_hue_and_saturation_to_image(img_properties=None, img=None):
+        """
+        Applies the hue and saturation to the image with a single conversion to HSV and back
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            img (numpy.ndarray): The image to be hue'd and saturation'd
+
+        Returns:
+            numpy.ndarray: The hue'd and saturation'd image
+        """
+        image_properties = img_properties
+        hue_value = AllEditFunctions._convert_hue(image_properties.hue)
+        saturation_factor = 1 + image_properties.saturation
+        return AllEditFunctions._adjust_hsv(img, hue_value, saturation_factor)
+
+    @staticmethod
+    def _adjust_hsv(img=None, hue_value=0, saturation_factor=1):
+        """
+        Shifts the hue and scales the saturation of the image. Both are looked up in small tables
+        and written back into the HSV buffer in place.
+
+        Parameters:
+            img (numpy.ndarray): The BGR image to be edited
+            hue_value (int): The hue shift, in OpenCV hue units (0 - 179)
+            saturation_factor (float): The saturation multiplier
+
+        Returns:
+            numpy.ndarray: The edited image
+        """
+        image = img
+        # Gray pixels have no hue or saturation to change
+        if (hue_value == 0 and saturation_factor == 1) or image.ndim == 2:
+            return image
         # Convert image to HSV
         hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
 
+        # Hue values range from 0 to 179
+        if hue_value != 0:
+            hue_table = ((np.arange(180) + hue_value) % 180).astype(np.uint8)
+            np.take(hue_table, hsv_image[:, :, 0], out=hsv_image[:, :, 0], mode="clip")
         # Saturation values range 0 - 255
-        hsv_image[:, :, 1] = np.clip(
-            hsv_image[:, :, 1] * saturation_factor, 0, 255).astype(np.uint8)
+        if saturation_factor != 1:
+            saturation_table = np.clip(
+                np.arange(256) * saturation_factor, 0, 255).astype(np.uint8)
+            np.take(saturation_table, hsv_image[:, :, 1], out=hsv_image[:, :, 1], mode="clip")
 
         # Convert back to BGR
-        image = cv2.cvtColor(hsv_image, cv2.COLOR_HSV2BGR)
+        image = cv2.cvtColor(hsv_image, cv2.COLOR_HSV2BGR, dst=hsv_image)
         return image
 
     @staticmethod
@@ -289,6 +351,8 @@ class AllEditFunctions:
         brightness_factor = AllEditFunctions._convert_brightness(
             brightness_value)
         contrast_factor = AllEditFunctions._convert_contrast(contrast_value)
+        if contrast_factor == 1 and brightness_factor == 0:
+            return image
         # applies the actual brightness change
         image = cv2.convertScaleAbs(
             image, alpha=contrast_factor, beta=brightness_factor)
@@ -312,9 +376,7 @@ class AllEditFunctions:
         image = AllEditFunctions._apply_brightness_and_contrast_to_image(
             image_properties, image)
         if image_properties.is_grayscaled == False:
-            image = AllEditFunctions._apply_hue_to_image(
-                image_properties, image)
-            image = AllEditFunctions._apply_saturation_to_image(
+            image = AllEditFunctions._apply_hue_and_saturation_to_image(
                 image_properties, image)
 
         return image
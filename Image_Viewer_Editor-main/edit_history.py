@@ -0,0 +1,133 @@
+import dataclasses
+import time
+from image_properties import ImageProperties
+
+
+class HistoryEntry:
+    __slots__ = ("title", "time", "changes")
+
+    def __init__(self, title="", time="", changes=()):
+        """
+        One edit in the history, holding only the fields it changed.
+
+        Parameters:
+            title (str): Title of the edit.
+            time (str): Time the edit was made.
+            changes (tuple): (field index, value before, value after) for each field the edit changed.
+        """
+        self.title = title
+        self.time = time
+        self.changes = changes
+
+
+class EditHistory:
+    # Fields of ImageProperties an edit records, zoom and pan only change the view
+    FIELDS = tuple(field.name for field in dataclasses.fields(ImageProperties)
+                   if field.name not in ("title", "time", "is_zoomed") and not field.name.startswith("pan_"))
+    # Every this many entries all values are kept, so any entry is rebuilt from at most this many changes
+    KEYFRAME_INTERVAL = 64
+
+    def __init__(self):
+        """
+        The list of edits made to the image. Each entry stores only the fields that changed,
+        so long sessions of slider edits take little memory and undo and redo only touch those fields.
+        """
+        self.entries = []  # HistoryEntry for each edit, oldest first
+        self.keyframes = []  # Values of all FIELDS at entries 0, KEYFRAME_INTERVAL, 2 * KEYFRAME_INTERVAL...
+        self._last = None  # Values of all FIELDS at the last entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def record(self, img_properties=None, title=""):
+        """
+        Adds the image properties as a new edit at the end of the history.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties after the edit
+            title (str): Title of the edit
+
+        Returns:
+            None
+        """
+        image_properties = img_properties
+        values = tuple(getattr(image_properties, name) for name in EditHistory.FIELDS)
+        changes = ()
+        if self._last is not None:
+            changes = tuple((index, before, after)
+                            for index, (before, after) in enumerate(zip(self._last, values)) if before != after)
+
+        if len(self.entries) % EditHistory.KEYFRAME_INTERVAL == 0:
+            self.keyframes.append(values)
+        self.entries.append(HistoryEntry(title, str(time.strftime('%H:%M:%S')), changes))
+        self._last = values
+
+    def truncate(self, length=0):
+        """
+        Drops every entry from the given length on, such as the edits that were undone.
+        """
+        del self.entries[length:]
+        interval = EditHistory.KEYFRAME_INTERVAL
+        del self.keyframes[(length + interval - 1) // interval:]
+        self._last = self.values(length - 1) if length > 0 else None
+
+    def clear(self):
+        """
+        Drops every entry.
+        """
+        self.truncate(0)
+
+    def values(self, index=0):
+        """
+        Returns the values of all FIELDS at an entry, rebuilt from the keyframe before it.
+        """
+        keyframe = index // EditHistory.KEYFRAME_INTERVAL
+        values = list(self.keyframes[keyframe])
+        for entry in self.entries[keyframe * EditHistory.KEYFRAME_INTERVAL + 1:index + 1]:
+            for field, _, after in entry.changes:
+                values[field] = after
+        return tuple(values)
+
+    def value(self, index=0, name=""):
+        """
+        Returns the value of one field at an entry.
+        """
+        field = EditHistory.FIELDS.index(name)
+        keyframe = index // EditHistory.KEYFRAME_INTERVAL
+        for entry in reversed(self.entries[keyframe * EditHistory.KEYFRAME_INTERVAL + 1:index + 1]):
+            for changed, _, after in entry.changes:
+                if changed == field:
+                    return after
+        return self.keyframes[keyframe][field]
+
+    def properties(self, index=0):
+        """
+        Returns a new ImageProperties holding the values at an entry.
+        """
+        entry = self.entries[index]
+        return ImageProperties(title=entry.title, time=entry.time,
+                               **dict(zip(EditHistory.FIELDS, self.values(index))))
+
+    def restore(self, img_properties=None, index=0):
+        """
+        Sets every recorded field of the image properties to its value at an entry. All fields are set,
+        since the image properties may hold values that were never recorded, such as slider previews.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties to change
+            index (int): The entry to restore
+
+        Returns:
+            None
+        """
+        image_properties = img_properties
+        for name, value in zip(EditHistory.FIELDS, self.values(index)):
+            setattr(image_properties, name, value)
+        image_properties.title = self.entries[index].title
+        image_properties.time = self.entries[index].time
@@ -0,0 +1,85 @@
+import threading
+from edit_planner import EditPlanner
+from geometry import Orientation
+from tile_executor import TileExecutor
+
+
+class EditPipeline:
+    def __init__(self, frame_cache=None, preview=False, fuse=False):
+        """
+        Runs the planned edits on an image while caching the output of every
+        operation, so that a change only recomputes the operations from the
+        first one whose inputs differ.
+
+        Parameters:
+            frame_cache (FrameCache): Optional cache of finished renders, looked up before running any operation.
+            preview (bool): If True, the renders are previews and large blurs are approximated.
+            fuse (bool): If True, runs of color edits go through lookup tables. Batches set it, the
+                editor renders each edit a few times at most and leaves it off.
+        """
+        self.frame_cache = frame_cache
+        self.preview = preview
+        self.fuse = fuse
+        self.source = None  # The image the cached results were made from
+        self.cache = []  # (operation key, result) for each operation of the last plan
+        self.last_plan = None  # The plan used for the last render, kept for inspection
+        self._lock = threading.Lock()  # Renders may come from the Tk thread and the render worker
+        self.tile_executor = TileExecutor.shared()  # Splits large images across cores
+
+    def clear(self):
+        """
+        Drops every cached result.
+        """
+        self.source = None
+        self.cache = []
+
+    def run(self, img_properties=None, img=None):
+        """
+        Applies all edits to the image, reusing cached results where the inputs are unchanged.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            img (numpy.ndarray): The original image to be edited
+
+        Returns:
+            numpy.ndarray: The edited image
+        """
+        with self._lock:
+            return self._run(img_properties, img)
+
+    def _run(self, img_properties=None, img=None):
+        """
+        Applies all edits to the image. The caller must hold self._lock.
+        """
+        image_properties = img_properties
+        if img is not self.source:
+            self.clear()
+            self.source = img
+
+        plan = EditPlanner.plan(image_properties, img.shape, fuse=self.fuse, preview=self.preview)
+        self.last_plan = plan
+
+        # Plans with the same key render the same frame, whatever else differs in the properties
+        if self.frame_cache is not None:
+            frame = self.frame_cache.get(img, plan.key)
+            if frame is not None:
+                return frame
+
+        image = img
+        for index, op in enumerate(plan.ops):
+            if index < len(self.cache) and self.cache[index][0] == op.key:
+                image = self.cache[index][1]
+                continue
+            del self.cache[index:]
+            image = self.tile_executor.apply(op, image_properties, image)
+            self.cache.append((op.key, image))
+        del self.cache[len(plan.ops):]
+
+        # Geometric edits may leave a strided view, later users expect contiguous memory
+        image = Orientation.materialize(image)
+        if self.cache:
+            self.cache[-1] = (self.cache[-1][0], image)
+
+        if self.frame_cache is not None:
+            self.frame_cache.put(img, plan.key, image)
+        return image
@@ -0,0 +1,316 @@
+from edit_functions import AllEditFunctions
+from color_lut import ColorLUT
+from geometry import Orientation
+from image_store import ImageStore
+from blur import Blur
+
+
+class EditOperation:
+    def __init__(self, name, params, function, halo=None):
+        """
+        A single edit that actually changes the image.
+
+        Parameters:
+            name (str): Name of the operation.
+            params (tuple): The values the operation depends on. Two operations with the same name and params give the same result.
+            function (callable): Function taking (img_properties, img) and returning the edited image.
+            halo (int): Rows of neighbors each output row depends on, 0 for per-pixel edits.
+                None if the operation cannot be split into row tiles.
+        """
+        self.name = name
+        self.params = params
+        self.function = function
+        self.halo = halo
+
+    @property
+    def key(self):
+        """
+        Returns a hashable key identifying the operation and its parameters.
+        """
+        return (self.name, self.params)
+
+    def apply(self, img_properties=None, img=None):
+        """
+        Applies the operation to the image.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            img (numpy.ndarray): The image to be edited
+
+        Returns:
+            numpy.ndarray: The edited image
+        """
+        return self.function(img_properties, img)
+
+    def __repr__(self):
+        return f"{self.name}{self.params}"
+
+
+class EditPlan:
+    def __init__(self, ops=None):
+        """
+        The ordered list of operations needed to render an ImageProperties.
+
+        Parameters:
+            ops (list): The EditOperation instances to run in order.
+        """
+        self.ops = ops if ops is not None else []
+
+    @property
+    def key(self):
+        """
+        Returns a hashable key for the whole plan.
+        """
+        return tuple(op.key for op in self.ops)
+
+    def describe(self):
+        """
+        Returns a readable list of the planned operations.
+        """
+        return [repr(op) for op in self.ops]
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __iter__(self):
+        return iter(self.ops)
+
+    def __repr__(self):
+        return "EditPlan(" + " -> ".join(self.describe()) + ")"
+
+
+class EditPlanner:
+    """
+    Turns an ImageProperties into the shortest list of operations that renders it.
+    Edits that would not change the image are dropped, and point operations are
+    moved where they are cheaper when that does not change the result.
+    """
+
+    # Per-pixel color edits that can be fused into one lookup table
+    COLOR_OPS = ("sepia", "brightness_contrast", "hue_saturation")
+
+    @staticmethod
+    def _color_lut_op(ops=None):
+        """
+        Returns a single operation applying the given color operations through a ColorLUT.
+        """
+        def apply(img_properties=None, img=None):
+            return ColorLUT.compile(ops, img_properties).apply(img)
+        return EditOperation("color_lut", tuple(op.key for op in ops), apply, halo=0)
+
+    @staticmethod
+    def color_runs(ops=None):
+        """
+        Returns every run of two or more adjacent color operations, the runs _fuse_color_ops can fuse.
+
+        Parameters:
+            ops (list): The EditOperation instances of a plan, in order.
+
+        Returns:
+            list: A list of operations for each run
+        """
+        runs = [[]]
+        for op in ops:
+            if op.name in EditPlanner.COLOR_OPS:
+                runs[-1].append(op)
+            elif runs[-1]:
+                runs.append([])
+        return [run for run in runs if len(run) >= 2]
+
+    @staticmethod
+    def _fuse_color_ops(ops=None):
+        """
+        Replaces every run of two or more adjacent color operations with one lookup table pass.
+        The table rounds a little differently from the operations it replaces, so the same edits
+        always take the same path: the caller decides once, not the number of renders so far.
+        """
+        fused = []
+        run = []
+        for op in ops + [None]:
+            if op is not None and op.name in EditPlanner.COLOR_OPS:
+                run.append(op)
+                continue
+            if len(run) >= 2:
+                fused.append(EditPlanner._color_lut_op(run))
+            else:
+                fused.extend(run)
+            run = []
+            if op is not None:
+                fused.append(op)
+        return fused
+
+    @staticmethod
+    def _cropped_shape(img_properties=None, shape=None):
+        """
+        Returns the (height, width) of the image after the crop is applied.
+        """
+        image_properties = img_properties
+        height, width = shape[:2]
+        if image_properties.crop_start_x == 0 or image_properties.crop_start_y == 0 or image_properties.crop_end_x == 0 or image_properties.crop_end_y == 0:
+            return height, width
+
+        x = slice(int(image_properties.crop_start_x),
+                  int(image_properties.crop_end_x), 1)
+        y = slice(int(image_properties.crop_start_y),
+                  int(image_properties.crop_end_y), 1)
+        return len(range(*y.indices(height))), len(range(*x.indices(width)))
+
+    @staticmethod
+    def _preview_blur_op(kernel_size=1, factor=1):
+        """
+        Returns an operation blurring a downscaled copy of the image, for previews with a large blur.
+        It cannot be tiled, each tile would be shrunk and scaled back up with its own edges.
+        """
+        def apply(img_properties=None, img=None):
+            return Blur.box_downscaled(img, kernel_size, factor)
+        return EditOperation("preview_blur", (kernel_size, factor), apply)
+
+    @staticmethod
+    def _orientation_op(orientation=None):
+        """
+        Returns an operation applying the orientation as a strided view.
+        """
+        def apply(img_properties=None, img=None):
+            return orientation.apply(img)
+        return EditOperation("orientation", orientation.params, apply)
+
+    @staticmethod
+    def _warp_op(orientation=None, size=None):
+        """
+        Returns an operation orienting and resizing the image in one warp.
+        """
+        def apply(img_properties=None, img=None):
+            return orientation.warp(img, size)
+        return EditOperation("warp", orientation.params + tuple(size), apply)
+
+    @staticmethod
+    def _geometry_ops(img_properties=None, shape=None):
+        """
+        Returns the crop, orientation and resize operations along with the resulting (height, width).
+        The crop is a view of the original and the rotation and both flips are composed into one
+        orientation, applied as a view as well. When the image is also resized, the orientation
+        and resize become one warp straight from the cropped view, so only the output pixels are
+        computed and the full-size rotated frame is never made.
+        """
+        image_properties = img_properties
+        ops = []
+
+        height, width = shape[:2]
+        cropped_height, cropped_width = EditPlanner._cropped_shape(
+            image_properties, shape)
+        if (cropped_height, cropped_width) != (height, width):
+            ops.append(EditOperation("crop", (int(image_properties.crop_start_x), int(image_properties.crop_start_y),
+                                              int(image_properties.crop_end_x), int(image_properties.crop_end_y)),
+                                     AllEditFunctions._apply_crop_to_image))
+        height, width = cropped_height, cropped_width
+
+        orientation = Orientation.from_properties(image_properties)
+        if orientation.swaps_axes:
+            height, width = width, height
+
+        size = (width, height)
+        if image_properties.is_resized is True:
+            size = (image_properties.altered_image_width,
+                    image_properties.altered_image_height)
+
+        # cv2.resize reads the whole source at once, the warp can stream a source over the memory budget
+        if size != (width, height) and (not orientation.is_identity or not ImageStore.fits_in_memory(shape)):
+            ops.append(EditPlanner._warp_op(orientation, size))
+        elif size != (width, height):
+            ops.append(EditOperation("resize", size,
+                                     AllEditFunctions._apply_resize_to_image))
+        elif not orientation.is_identity:
+            ops.append(EditPlanner._orientation_op(orientation))
+
+        width, height = size
+        return ops, (height, width)
+
+    @staticmethod
+    def output_shape(img_properties=None, shape=None):
+        """
+        Returns the (height, width) the image properties render an image of the given shape to.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            shape (tuple): The shape of the original image
+
+        Returns:
+            tuple: The (height, width) of the edited image
+        """
+        AllEditFunctions._update_altered_dimensions(img_properties)
+        return EditPlanner._geometry_ops(img_properties, shape)[1]
+
+    @staticmethod
+    def plan(img_properties=None, shape=None, fuse=True, preview=False):
+        """
+        Builds the plan for rendering the image properties onto an image of the given shape.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            shape (tuple): The shape of the original image
+            fuse (bool): If True, runs of color operations are fused into lookup tables, which are worth
+                building for edits rendered many times, such as every file of a batch. The fused
+                operation has a key of its own, so frames rendered either way are never mixed up.
+            preview (bool): If True, large blurs are approximated on a downscaled copy
+
+        Returns:
+            EditPlan: The operations to run, in order
+        """
+        image_properties = img_properties
+        # Resize reads the altered dimensions, which depend on the rotation
+        AllEditFunctions._update_altered_dimensions(image_properties)
+
+        geometry_ops, output_shape = EditPlanner._geometry_ops(
+            image_properties, shape)
+
+        grayscale_ops = []
+        if image_properties.is_grayscaled and len(shape) == 3:
+            grayscale_ops.append(EditOperation("grayscale", (True,),
+                                               AllEditFunctions._apply_grayscale_to_image, halo=0))
+
+        filter_ops = []
+        if image_properties.is_sepia:
+            filter_ops.append(EditOperation("sepia", (True,),
+                                           AllEditFunctions._apply_sepia_to_image, halo=0))
+
+        kernel_size = Blur.kernel_size(image_properties.blur)
+        blur_factor = Blur.preview_factor(kernel_size) if preview else 1
+        if blur_factor > 1:
+            filter_ops.append(EditPlanner._preview_blur_op(kernel_size, blur_factor))
+        elif kernel_size > 1:
+            filter_ops.append(EditOperation("blur", (kernel_size,),
+                                           AllEditFunctions._apply_blur_to_image, halo=kernel_size // 2))
+
+        contrast_factor = AllEditFunctions._convert_contrast(
+            image_properties.contrast)
+        brightness_factor = AllEditFunctions._convert_brightness(
+            image_properties.brightness)
+        if contrast_factor != 1 or brightness_factor != 0:
+            filter_ops.append(EditOperation("brightness_contrast", (contrast_factor, brightness_factor),
+                                           AllEditFunctions._apply_brightness_and_contrast_to_image, halo=0))
+
+        # Gray images only have color again after sepia
+        if image_properties.is_grayscaled == False and (len(shape) == 3 or image_properties.is_sepia):
+            # Hue and saturation share one conversion to HSV and back
+            hue_value = AllEditFunctions._convert_hue(image_properties.hue)
+            saturation_factor = 1 + image_properties.saturation
+            if hue_value != 0 or saturation_factor != 1:
+                filter_ops.append(EditOperation("hue_saturation", (hue_value, saturation_factor),
+                                               AllEditFunctions._apply_hue_and_saturation_to_image, halo=0))
+
+        # Grayscale is per pixel, so it gives the same result before the
+        # orientation. Running it right after the crop means the geometric
+        # edits only move one channel, unless a resize shrinks the image
+        # anyway.
+        original_pixels = shape[0] * shape[1]
+        output_pixels = output_shape[0] * output_shape[1]
+        if grayscale_ops and output_pixels >= original_pixels:
+            crop_ops = [op for op in geometry_ops if op.name == "crop"]
+            other_ops = [op for op in geometry_ops if op.name != "crop"]
+            ops = crop_ops + grayscale_ops + other_ops + filter_ops
+        else:
+            ops = geometry_ops + grayscale_ops + filter_ops
+
+        if not fuse:
+            return EditPlan(ops)
+        return EditPlan(EditPlanner._fuse_color_ops(ops))
@@ -1,6 +1,4 @@
-import time
 from tkinter import Frame, Button, Toplevel, Label, Button, Entry
-from image_properties import ImageProperties
 from advanced_editor_tools import AdvancedEditorTools
 
 
@@ -325,60 +323,11 @@ class EditorOptions(Frame):
         Returns:
             None
         """
-        edit_instance = self._make_edit_instance(title)
         self._check_undo_performed()
-        self.master.master.history.append(edit_instance)
+        self.master.master.history.record(self.master.master.image_properties, title)
         self.master.master.history_of_edits.update_history_list()
         self.master.master.history_of_edits._set_indices()
 
-    def _make_edit_instance(self, title):
-        """
-        Creates an edit instance with the current self.master.master.image_properties values.
-
-        Parameters:
-            title (str): Title for the edit instance.
-
-        Returns:
-            edit_instance (ImageProperties): An instance of the ImageProperties class.
-        """
-        edit_instance = ImageProperties(
-            title=title,
-            time=str(time.strftime('%H:%M:%S')),
-            is_flipped_horz=self.master.master.image_properties.is_flipped_horz,
-            is_flipped_vert=self.master.master.image_properties.is_flipped_vert,
-            is_grayscaled=self.master.master.image_properties.is_grayscaled,
-            is_sepia=self.master.master.image_properties.is_sepia,
-            is_cropped=self.master.master.image_properties.is_cropped,
-            is_resized=self.master.master.image_properties.is_resized,
-            original_image_height=self.master.master.image_properties.original_image_height,
-            original_image_width=self.master.master.image_properties.original_image_width,
-            altered_image_height=self.master.master.image_properties.altered_image_height,
-            altered_image_width=self.master.master.image_properties.altered_image_width,
-            resize_image_height=self.master.master.image_properties.resize_image_height,
-            resize_image_width=self.master.master.image_properties.resize_image_width,
-            zoom_scale_factor=self.master.master.image_properties.zoom_scale_factor,
-            rotation=self.master.master.image_properties.rotation,
-            brightness=self.master.master.image_properties.brightness,
-            contrast=self.master.master.image_properties.contrast,
-            saturation=self.master.master.image_properties.saturation,
-            blur=self.master.master.image_properties.blur,
-            hue=self.master.master.image_properties.hue,
-            crop_start_x=self.master.master.image_properties.crop_start_x,
-            crop_start_y=self.master.master.image_properties.crop_start_y,
-            crop_end_x=self.master.master.image_properties.crop_end_x,
-            crop_end_y=self.master.master.image_properties.crop_end_y,
-            crop_ratio=self.master.master.image_properties.crop_ratio,
-            crop_rectangle_width=self.master.master.image_properties.crop_rectangle_width,
-            crop_rectangle_height=self.master.master.image_properties.crop_rectangle_height,
-            at_time_canvas_width=self.master.master.image_properties.at_time_canvas_width,
-            at_time_canvas_height=self.master.master.image_properties.at_time_canvas_height,
-            pan_start_x=self.master.master.image_properties.pan_start_x,
-            pan_start_y=self.master.master.image_properties.pan_start_y,
-            pan_coord_x=self.master.master.image_properties.pan_coord_x,
-            pan_coord_y=self.master.master.image_properties.pan_coord_y
-        )
-        return edit_instance
-
     def update_metadata_labels(self, file_size, resolution, file_name, file_extension, bytes_per_pixel, zoom_resolution):
         """
         Updates the metadata labels.
@@ -1,14 +1,15 @@
 import os
 from tkinter import filedialog, simpledialog
 import cv2 as cv
-import imageio
 import glob
+from image_io import ImageIO
 
 
 class FileManager:
     def __init__(self):
         self.file = None
         self.batch_files = None  # Alternate variable for a list of batch processed files
+        self.batch_output = None  # Where batch processed files are written: ("in_place" | "folder" | "archive", path)
 
     def get_file(self):
         """
@@ -83,7 +84,7 @@ class FileManager:
         """
         if self.file:
             # Overwrites existing file with new edits
-            cv.imwrite(self.file, content)
+            ImageIO.write_image(self.file, content)
 
     @staticmethod
     def save_as_file(content):
@@ -112,19 +113,8 @@ class FileManager:
             defaultextension=".png", filetypes=valid_file_types)
 
         if file_path:
-            if file_path.endswith("gif"):
-                # Opencv cant sasve images as GIF. Imageio is used to save.
-                imageio.mimsave(file_path, [content])
-
-                # Change color values from RBG to BGR
-                image_rgb = imageio.imread(file_path)
-                image_bgr = cv.cvtColor(image_rgb, cv.COLOR_RGB2BGR)
-                # Save the image again with correct colors.
-                imageio.mimsave(file_path, [image_bgr])
-
-            else:
-                # Saves the file in that destination
-                cv.imwrite(file_path, content)
+            # Saves the file in that destination, GIF files are written with the channels swapped to RGB
+            ImageIO.write_image(file_path, content)
 
     def delete_file(self):
         """
@@ -170,11 +160,6 @@ class FileManager:
             if not folder_path:
                 return  # User cancelled folder selection
 
-            warning = simpledialog.messagebox.askokcancel("Warning",
-                                                          "Batch processing is irreversible. Are you sure you want to proceed?")
-            if warning is False:
-                return  # User decided to cancel the process
-
             file_set = []
             for file_type in valid_file_types:
                 _, file_extension = file_type
@@ -189,11 +174,6 @@ class FileManager:
             if not file_set:
                 return
 
-            warning = simpledialog.messagebox.askokcancel("Warning",
-                                                          "Batch processing is irreversible. Are you sure you want to proceed?")
-            if warning is False:
-                return  # User decided to cancel the process
-
             file_set = list(file_set)
 
         for i, file_path in enumerate(file_set):
@@ -221,3 +201,37 @@ class FileManager:
                 "GIF(s) Detected", "For each GIF file that was processed, another image was created of its first frame.")
 
         self.batch_files = file_set
+
+    def get_batch_output(self):
+        """
+        Prompts user to choose where the batch processed files are written: over the selected files,
+        into a folder, or into a single archive.
+
+        Returns:
+            None"""
+        answer = simpledialog.messagebox.askyesnocancel("Batch Output",
+                                                        "Would you like to keep the original files? \n\nYes writes the edited images to a folder or an archive, No overwrites the selected files.")
+
+        if answer is None:
+            return
+
+        if answer is False:
+            warning = simpledialog.messagebox.askokcancel("Warning",
+                                                          "Batch processing in place is irreversible. Are you sure you want to proceed?")
+            if warning is False:
+                return  # User decided to cancel the process
+            self.batch_output = ("in_place", None)
+            return
+
+        # An archive is written in one go, much quicker than many separate files on network drives
+        use_archive = simpledialog.messagebox.askyesno("Batch Output",
+                                                       "Would you like to write the edited images into a single archive? \n\nNo selects a folder instead.")
+        if use_archive:
+            archive_path = filedialog.asksaveasfilename(
+                defaultextension=".zip", filetypes=[("ZIP archives", "*.zip"), ("TAR archives", "*.tar")])
+            if archive_path:
+                self.batch_output = ("archive", archive_path)
+        else:
+            folder_path = filedialog.askdirectory()
+            if folder_path:
+                self.batch_output = ("folder", folder_path)
@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+
+class FrameCache:
+    # Memory the cached frames may use, in bytes
+    MEMORY_BUDGET = 512 << 20
+    # Most recently used frames kept uncompressed, the current one and its neighbors in the history
+    HOT_FRAMES = 3
+    # PNG level for cold frames. PNG filters each row before deflating, which roughly halves
+    # photos where plain zlib saves about a tenth, and low levels are several times faster
+    COMPRESSION_LEVEL = 1
+
+    def __init__(self, memory_budget=None, compress=True):
+        """
+        Least recently used cache of rendered frames, so stepping through the history shows
+        frames that were rendered before instead of rendering them again.
+
+        Parameters:
+            memory_budget (int): Bytes the cached frames may use, defaults to MEMORY_BUDGET
+            compress (bool): If True, compress_cold() keeps frames that have not been used recently PNG compressed
+        """
+        self.memory_budget = FrameCache.MEMORY_BUDGET if memory_budget is None else int(memory_budget)
+        self.compress = compress
+        self.source = None  # The image the frames were rendered from
+        self.frames = OrderedDict()  # key -> (frame, size), the frame is an image or its encoded PNG bytes
+        self.size = 0  # Bytes used by all frames
+        self._lock = threading.Lock()  # Frames are added by the render worker and the prerender worker
+
+    def set_memory_budget(self, budget=None):
+        """
+        Sets how much memory the cached frames may use, dropping frames that no longer fit.
+
+        Parameters:
+            budget (int): The budget in bytes
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.memory_budget = int(budget)
+            self._evict()
+
+    def clear(self):
+        """
+        Drops every frame.
+        """
+        with self._lock:
+            self.source = None
+            self.frames.clear()
+            self.size = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self.frames
+
+    def get(self, img=None, key=None):
+        """
+        Returns the frame rendered from the image for the key, or None if it is not cached.
+
+        Parameters:
+            img (numpy.ndarray): The original image the frame is rendered from
+            key (tuple): The key of the edit plan the frame is rendered with
+
+        Returns:
+            numpy.ndarray: The frame, or None
+        """
+        with self._lock:
+            if img is not self.source or key not in self.frames:
+                return None
+
+            frame = self.frames[key][0]
+            if isinstance(frame, bytes):
+                frame = cv2.imdecode(np.frombuffer(frame, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+                self._replace(key, frame, frame.nbytes)
+            self.frames.move_to_end(key)
+            self._evict()
+            return frame
+
+    def put(self, img=None, key=None, frame=None):
+        """
+        Caches a frame rendered from the image. Frames rendered from another image are dropped first.
+        Frames that are disk backed, larger than the whole budget or not 8 bit are not cached.
+
+        Parameters:
+            img (numpy.ndarray): The original image the frame is rendered from
+            key (tuple): The key of the edit plan the frame is rendered with
+            frame (numpy.ndarray): The rendered frame
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if img is not self.source:
+                self.frames.clear()
+                self.size = 0
+                self.source = img
+
+            if isinstance(frame, np.memmap) or frame.nbytes > self.memory_budget or frame.dtype != np.uint8:
+                return
+
+            if key in self.frames:
+                self._replace(key, frame, frame.nbytes)
+            else:
+                self.frames[key] = (frame, frame.nbytes)
+                self.size += frame.nbytes
+            self.frames.move_to_end(key)
+            self._evict()
+
+    def _replace(self, key=None, frame=None, size=0):
+        """
+        Replaces the frame stored for the key, keeping its place. The caller must hold self._lock.
+        """
+        self.size += size - self.frames[key][1]
+        self.frames[key] = (frame, size)
+
+    def compress_cold(self):
+        """
+        Compresses the frames that are no longer among the most recently used. Encoding a large frame
+        takes a good part of a second, so this is meant for a background thread. The lock is only held
+        between frames, so renders can keep using the cache meanwhile.
+        """
+        skipped = set()  # Frames that do not get any smaller
+        while self.compress:
+            with self._lock:
+                cold = [key for key in list(self.frames)[:-FrameCache.HOT_FRAMES]
+                        if isinstance(self.frames[key][0], np.ndarray) and key not in skipped]
+                if not cold:
+                    return
+                # The most recently used cold frame is the most likely to be wanted again
+                key = cold[-1]
+                frame = self.frames[key][0]
+
+            ok, data = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, FrameCache.COMPRESSION_LEVEL])
+            if not ok or data.nbytes >= frame.nbytes:
+                skipped.add(key)
+                continue
+
+            with self._lock:
+                # The frame may have been used, replaced or dropped while it was encoded
+                if key in self.frames and self.frames[key][0] is frame \
+                        and key not in list(self.frames)[-FrameCache.HOT_FRAMES:]:
+                    self._replace(key, data.tobytes(), data.nbytes)
+
+    def _evict(self):
+        """
+        Drops the least recently used frames until the rest fit the budget. The caller must hold self._lock.
+        """
+        while self.size > self.memory_budget and self.frames:
+            _, (_, size) = self.frames.popitem(last=False)
+            self.size -= size
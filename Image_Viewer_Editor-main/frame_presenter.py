@@ -0,0 +1,71 @@
+import time
+from tkinter import PhotoImage
+
+
+class FramePresenter:
+    # Tag of the canvas item showing the frame
+    TAG = "frame"
+
+    def __init__(self, canvas=None):
+        """
+        Shows frames of RGB or gray pixels on a canvas. One canvas item and one PhotoImage are kept
+        and the pixels are written into the PhotoImage as PPM/PGM data, without going through PIL.
+
+        Parameters:
+            canvas (tkinter.Canvas): The canvas the frames are shown on.
+        """
+        self.canvas = canvas
+        self.photo = None  # PhotoImage holding the current frame, replaced only when the frame size changes
+        self.item = None  # Canvas item showing the photo
+        self.frame = None  # The pixels last uploaded
+        self.upload_time = 0.0  # Milliseconds taken by the last upload
+
+    @staticmethod
+    def _encode(pixels=None):
+        """
+        Returns the pixels as binary PPM (RGB) or PGM (gray) data, which Tk reads directly.
+        """
+        height, width = pixels.shape[:2]
+        kind = 6 if pixels.ndim == 3 else 5
+        header = f"P{kind} {width} {height} 255 ".encode("ascii")
+        return header + pixels.tobytes()
+
+    def show(self, pixels=None, x=0, y=0):
+        """
+        Shows the pixels with their top left corner at (x, y). Pixels that were shown last
+        are not uploaded again, the frame is only moved.
+
+        Parameters:
+            pixels (numpy.ndarray): The RGB or gray uint8 pixels
+            x (float): Canvas x coordinate of the left edge
+            y (float): Canvas y coordinate of the top edge
+
+        Returns:
+            None
+        """
+        if pixels is not self.frame:
+            start = time.perf_counter()
+            height, width = pixels.shape[:2]
+            if self.photo is None or (self.photo.width(), self.photo.height()) != (width, height):
+                self.photo = PhotoImage(master=self.canvas, width=width, height=height)
+            self.photo.configure(data=FramePresenter._encode(pixels), format="PPM")
+            self.frame = pixels
+            self.upload_time = (time.perf_counter() - start) * 1000
+
+        if self.item is None:
+            self.item = self.canvas.create_image(x, y, anchor="nw", image=self.photo,
+                                                 tags=(FramePresenter.TAG,))
+            self.canvas.tag_lower(self.item)
+        else:
+            if self.canvas.itemcget(self.item, "image") != str(self.photo):
+                self.canvas.itemconfig(self.item, image=self.photo)
+            self.canvas.coords(self.item, x, y)
+
+    def hide(self):
+        """
+        Removes the frame from the canvas.
+        """
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        self.item = None
+        self.frame = None
@@ -0,0 +1,171 @@
+import cv2
+import numpy as np
+from image_store import ImageStore
+
+
+class Orientation:
+    def __init__(self, quarter_turns=0, mirrored=False):
+        """
+        One of the eight orientations reachable by rotating by multiples of 90 degrees and flipping.
+        The image is first rotated counter-clockwise, then mirrored left to right.
+
+        Parameters:
+            quarter_turns (int): Number of counter-clockwise 90 degree turns.
+            mirrored (bool): Whether the rotated image is flipped horizontally.
+        """
+        self.quarter_turns = quarter_turns % 4
+        self.mirrored = mirrored
+
+    @staticmethod
+    def from_properties(img_properties=None):
+        """
+        Composes the rotation and both flips of the image properties into one orientation.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+
+        Returns:
+            Orientation: The combined orientation
+        """
+        image_properties = img_properties
+        quarter_turns = (image_properties.rotation % 360) // 90
+        # A vertical flip is a half turn followed by a horizontal flip
+        if image_properties.is_flipped_vert:
+            quarter_turns += 2
+        mirrored = bool(image_properties.is_flipped_horz) != bool(
+            image_properties.is_flipped_vert)
+        return Orientation(quarter_turns, mirrored)
+
+    @property
+    def is_identity(self):
+        """
+        Returns True if the orientation leaves the image unchanged.
+        """
+        return self.quarter_turns == 0 and not self.mirrored
+
+    @property
+    def swaps_axes(self):
+        """
+        Returns True if the width and height of the image are swapped.
+        """
+        return self.quarter_turns % 2 == 1
+
+    @property
+    def params(self):
+        """
+        Returns the (quarter_turns, mirrored) pair describing the orientation.
+        """
+        return (self.quarter_turns, self.mirrored)
+
+    def apply(self, img=None):
+        """
+        Orients the image without copying it.
+
+        Parameters:
+            img (numpy.ndarray): The image to be oriented
+
+        Returns:
+            numpy.ndarray: A strided view of the oriented image
+        """
+        image = img
+        if self.quarter_turns:
+            image = np.rot90(image, self.quarter_turns)
+        if self.mirrored:
+            image = image[:, ::-1]
+        return image
+
+    def source_matrix(self, width=0, height=0):
+        """
+        Returns the 3x3 matrix mapping pixel coordinates of the oriented image back to the source image.
+
+        Parameters:
+            width (int): Width of the source image
+            height (int): Height of the source image
+
+        Returns:
+            numpy.ndarray: The (x, y, 1) -> (x, y, 1) matrix
+        """
+        turns = {
+            0: [[1, 0, 0], [0, 1, 0]],
+            1: [[0, -1, width - 1], [1, 0, 0]],
+            2: [[-1, 0, width - 1], [0, -1, height - 1]],
+            3: [[0, 1, 0], [-1, 0, height - 1]],
+        }
+        matrix = np.vstack([turns[self.quarter_turns], [0, 0, 1]]).astype(np.float64)
+        if self.mirrored:
+            oriented_width = height if self.swaps_axes else width
+            mirror = np.array([[-1, 0, oriented_width - 1],
+                               [0, 1, 0],
+                               [0, 0, 1]], dtype=np.float64)
+            matrix = matrix @ mirror
+        return matrix
+
+    def warp(self, img=None, size=None):
+        """
+        Orients and resizes the image with a single warpAffine, so only the output pixels are computed.
+        Pixels are sampled the same way cv2.resize samples them with linear interpolation.
+        Outputs over the memory budget are warped one band of rows at a time into a disk backed image.
+
+        Parameters:
+            img (numpy.ndarray): The image to be oriented and resized
+            size (tuple): The (width, height) of the output
+
+        Returns:
+            numpy.ndarray: The oriented and resized image
+        """
+        image = img
+        height, width = image.shape[:2]
+        oriented_width, oriented_height = (height, width) if self.swaps_axes else (width, height)
+        output_width, output_height = size
+
+        # Output pixel centers onto the oriented image, as cv2.resize does
+        scale_x = oriented_width / output_width
+        scale_y = oriented_height / output_height
+        scale = np.array([[scale_x, 0, 0.5 * scale_x - 0.5],
+                          [0, scale_y, 0.5 * scale_y - 0.5],
+                          [0, 0, 1]], dtype=np.float64)
+
+        matrix = self.source_matrix(width, height) @ scale
+        if ImageStore.fits_in_memory((output_height, output_width) + image.shape[2:], image.dtype) \
+                and not ImageStore.is_out_of_core(image):
+            return cv2.warpAffine(image, matrix[:2], (output_width, output_height),
+                                  flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                                  borderMode=cv2.BORDER_REPLICATE)
+
+        output = ImageStore.empty((output_height, output_width) + image.shape[2:], image.dtype)
+        rows = ImageStore.band_rows(output)
+        for start in range(0, output_height, rows):
+            end = min(start + rows, output_height)
+            band = matrix @ np.array([[1, 0, 0], [0, 1, start], [0, 0, 1]], dtype=np.float64)
+            # Only read the part of the source the band samples from, with a pixel of margin
+            # so the interpolation matches the whole-image warp
+            corners = band @ np.array([[0, output_width, 0, output_width],
+                                       [0, 0, end - start, end - start],
+                                       [1, 1, 1, 1]], dtype=np.float64)
+            left = max(0, int(np.floor(corners[0].min())) - 1)
+            right = min(width, int(np.ceil(corners[0].max())) + 2)
+            top = max(0, int(np.floor(corners[1].min())) - 1)
+            bottom = min(height, int(np.ceil(corners[1].max())) + 2)
+            band = np.array([[1, 0, -left], [0, 1, -top], [0, 0, 1]], dtype=np.float64) @ band
+            output[start:end] = cv2.warpAffine(image[top:bottom, left:right], band[:2],
+                                               (output_width, end - start),
+                                               flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                                               borderMode=cv2.BORDER_REPLICATE)
+        return output
+
+    @staticmethod
+    def materialize(img=None):
+        """
+        Copies a strided view into contiguous memory, if it is not contiguous already.
+        Views over the memory budget are copied into a disk backed image.
+
+        Parameters:
+            img (numpy.ndarray): The image to be copied
+
+        Returns:
+            numpy.ndarray: A C-contiguous image
+        """
+        return ImageStore.contiguous(img)
+
+    def __repr__(self):
+        return f"Orientation(quarter_turns={self.quarter_turns}, mirrored={self.mirrored})"
@@ -1,8 +1,11 @@
-from tkinter import Frame, Button, END, LEFT, BOTH, YES, BOTTOM, X, TOP, CENTER
+from tkinter import Frame, Button, END, LEFT, RIGHT, BOTH, YES, BOTTOM, X, Y, TOP, CENTER, VERTICAL
 from tkinter import ttk
 
 
 class History(Frame):
+    # Histories longer than this only have rows for the entries in view, which are refilled as the list scrolls
+    MAX_ROWS = 500
+
     def __init__(self, master=None):
 
         Frame.__init__(self, master=master, bg="#6b6b6b")
@@ -17,10 +20,20 @@ class History(Frame):
         history_frame = Frame(self, bg="#6b6b6b")
         history_frame.pack(side=TOP, fill=BOTH, expand=YES)
 
-        # Sets up a Treeview widget for displaying history items
-        self.history_tree = ttk.Treeview(history_frame, columns=(
+        # Sets up a Treeview widget for displaying history items, with a scrollbar beside it
+        list_frame = Frame(history_frame, bg="#6b6b6b")
+        list_frame.pack(side=TOP, fill=BOTH, expand=YES)
+        self.history_tree = ttk.Treeview(list_frame, columns=(
             "Title", "Time"), show="headings", height=20)
-        self.history_tree.pack(side=TOP, fill=BOTH, expand=YES)
+        self.history_scrollbar = ttk.Scrollbar(list_frame, orient=VERTICAL)
+        self.history_scrollbar.pack(side=RIGHT, fill=Y)
+        self.history_tree.pack(side=LEFT, fill=BOTH, expand=YES)
+
+        self.rows = []  # Treeview item of each row, top to bottom
+        self.row_entries = []  # The history entry shown in each row
+        self.first_row = 0  # Index of the entry in the top row
+        self.is_virtual = False  # True while only the entries in view have rows
+        self._set_virtual(False)
 
         # Configures columns and headings for the Treeview
         self.history_tree.column("Title", width=150, anchor=CENTER)
@@ -29,11 +42,13 @@ class History(Frame):
         self.history_tree.heading("Time", text="Time")
 
         # Inserts existing history items into the Treeview
-        for item in self.history_arr:
-            self.history_tree.insert("", END, values=(item.title, item.time))
+        self.update_history_list()
 
-        # Binds a click event to the Treeview
+        # Binds a click event to the Treeview, and the mouse wheel for when the rows are virtual
         self.history_tree.bind("<ButtonRelease>", self._item_clicked)
+        self.history_tree.bind("<MouseWheel>", self._wheel_scrolled)
+        self.history_tree.bind("<Button-4>", self._wheel_scrolled)
+        self.history_tree.bind("<Button-5>", self._wheel_scrolled)
 
         # Creates a frame for buttons related to undo and redo actions
         button_frame = Frame(history_frame, bg="#6b6b6b")
@@ -55,47 +70,17 @@ class History(Frame):
         self.current_index = self.history_length - 1
         self.starting_index = 0
 
-    def _set_image_properties(self, property_instance):
+    def _set_image_properties(self, index):
         """
-        Sets the image properties to the values from the property instance.
+        Sets the image properties to the values of a history entry.
 
         Parameters:
-            property_instance (Property): The property instance to retrieve values from.
+            index (int): Index of the history entry to set.
 
         Returns:
             None
         """
-        self.master.master.image_properties.title = property_instance.title
-        self.master.master.image_properties.time = property_instance.time
-        self.master.master.image_properties.is_flipped_horz = property_instance.is_flipped_horz
-        self.master.master.image_properties.is_flipped_vert = property_instance.is_flipped_vert
-        self.master.master.image_properties.is_grayscaled = property_instance.is_grayscaled
-        self.master.master.image_properties.is_sepia = property_instance.is_sepia
-        self.master.master.image_properties.is_cropped = property_instance.is_cropped
-        self.master.master.image_properties.is_rotated = property_instance.is_rotated
-        self.master.master.image_properties.is_resized = property_instance.is_resized
-        self.master.master.image_properties.original_image_height = property_instance.original_image_height
-        self.master.master.image_properties.original_image_width = property_instance.original_image_width
-        self.master.master.image_properties.altered_image_height = property_instance.altered_image_height
-        self.master.master.image_properties.altered_image_width = property_instance.altered_image_width
-        self.master.master.image_properties.resize_image_height = property_instance.resize_image_height
-        self.master.master.image_properties.resize_image_width = property_instance.resize_image_width
-        self.master.master.image_properties.zoom_scale_factor = property_instance.zoom_scale_factor
-        self.master.master.image_properties.rotation = property_instance.rotation
-        self.master.master.image_properties.brightness = property_instance.brightness
-        self.master.master.image_properties.contrast = property_instance.contrast
-        self.master.master.image_properties.saturation = property_instance.saturation
-        self.master.master.image_properties.blur = property_instance.blur
-        self.master.master.image_properties.hue = property_instance.hue
-        self.master.master.image_properties.crop_start_x = property_instance.crop_start_x
-        self.master.master.image_properties.crop_start_y = property_instance.crop_start_y
-        self.master.master.image_properties.crop_end_x = property_instance.crop_end_x
-        self.master.master.image_properties.crop_end_y = property_instance.crop_end_y
-        self.master.master.image_properties.crop_ratio = property_instance.crop_ratio
-        self.master.master.image_properties.crop_rectangle_width = property_instance.crop_rectangle_width
-        self.master.master.image_properties.crop_rectangle_height = property_instance.crop_rectangle_height
-        self.master.master.image_properties.at_time_canvas_width = property_instance.at_time_canvas_width
-        self.master.master.image_properties.at_time_canvas_height = property_instance.at_time_canvas_height
+        self.history_arr.restore(self.master.master.image_properties, index)
 
     def undo_action(self, event=None):
         """
@@ -110,8 +95,8 @@ class History(Frame):
         if self.current_index > self.starting_index:
             self.master.master.undo_performed = True
             self.current_index -= 1
-        property_instance = self.history_arr[self.current_index]
-        self._set_image_properties(property_instance)
+        self._set_image_properties(self.current_index)
+        self._see(self.current_index)
         self.update_displayed_image()
 
     def redo_action(self, event=None):
@@ -126,8 +111,8 @@ class History(Frame):
         """
         if self.current_index < self.history_length - 1:
             self.current_index += 1
-            property_instance = self.history_arr[self.current_index]
-            self._set_image_properties(property_instance)
+            self._set_image_properties(self.current_index)
+            self._see(self.current_index)
             self.update_displayed_image()
         else:
             print("No undo action to redo")
@@ -142,33 +127,130 @@ class History(Frame):
         Returns:
             None
         """
-        item = self.history_tree.selection()[0]
-        index = self.history_tree.index(item)
+        selection = self.history_tree.selection()
+        if not selection:
+            return
+        index = self.first_row + self.history_tree.index(selection[0])
         self.current_index = index
         if self.current_index > self.starting_index:
             self.master.master.undo_performed = True
-        property_instance = self.history_arr[index]
-        self._set_image_properties(property_instance)
+        self._set_image_properties(index)
         self.update_displayed_image()
 
     def update_history_list(self):
         """
-        Updates the history list by deleting all items and inserting new items from the updated history array.
+        Updates the history list to match the history array. Only the rows of entries that were
+        added or dropped are changed, so the cost does not grow with the length of the history.
         """
-        # Deletes all items from the Treeview
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
+        length = len(self.history_arr)
+        if length > History.MAX_ROWS:
+            # Shows the newest entries, as the full list would after an edit
+            self._set_virtual(True)
+            self._show_window(length - int(self.history_tree.cget("height")))
+            return
+
+        if self.is_virtual:
+            self._set_virtual(False)
+            self._remove_rows(0)
+
+        # Drops the rows of entries that were undone and cleared, then adds rows for the new entries
+        count = len(self.rows)
+        while count > 0 and (count > length or self.row_entries[count - 1] is not self.history_arr[count - 1]):
+            count -= 1
+        self._remove_rows(count)
+        for index in range(count, length):
+            self._add_row(self.history_arr[index])
 
-        # Inserts new items from the updated history list into the Treeview
-        for item in self.history_arr:
-            self.history_tree.insert("", END, values=(item.title, item.time))
+    def _add_row(self, entry=None):
+        """
+        Adds a row for a history entry below the last row.
+        """
+        self.rows.append(self.history_tree.insert("", END, values=(entry.title, entry.time)))
+        self.row_entries.append(entry)
+
+    def _remove_rows(self, start=0):
+        """
+        Deletes every row from the given row on.
+        """
+        if start < len(self.rows):
+            self.history_tree.delete(*self.rows[start:])
+            del self.rows[start:]
+            del self.row_entries[start:]
+
+    def _set_virtual(self, is_virtual=False):
+        """
+        Switches between a row for every entry, scrolled by the Treeview, and rows for only
+        the entries in view, scrolled by refilling them.
+        """
+        self.is_virtual = is_virtual
+        if is_virtual:
+            self.history_tree.configure(yscrollcommand="")
+            self.history_scrollbar.configure(command=self._scroll)
+        else:
+            self.first_row = 0
+            self.history_tree.configure(yscrollcommand=self.history_scrollbar.set)
+            self.history_scrollbar.configure(command=self.history_tree.yview)
+
+    def _show_window(self, first=0):
+        """
+        Fills the rows with the entries from the given index on, while the rows are virtual.
+        Rows are reused, only their text changes.
+        """
+        length = len(self.history_arr)
+        visible = min(length, int(self.history_tree.cget("height")))
+        first = min(max(0, first), length - visible)
+
+        self._remove_rows(visible)
+        for index in range(visible):
+            entry = self.history_arr[first + index]
+            if index == len(self.rows):
+                self._add_row(entry)
+            elif self.row_entries[index] is not entry:
+                self.history_tree.item(self.rows[index], values=(entry.title, entry.time))
+                self.row_entries[index] = entry
+
+        self.first_row = first
+        self.history_scrollbar.set(first / length, (first + visible) / length)
+
+    def _scroll(self, *args):
+        """
+        Scrollbar command while the rows are virtual, scrolls by moving the window of entries.
+        """
+        visible = len(self.rows)
+        if args[0] == "moveto":
+            first = int(float(args[1]) * len(self.history_arr))
+        else:
+            step = visible if args[2] == "pages" else 1
+            first = self.first_row + int(args[1]) * step
+        self._show_window(first)
+
+    def _wheel_scrolled(self, event=None):
+        """
+        Scrolls the virtual rows with the mouse wheel. The Treeview scrolls itself otherwise.
+        """
+        if not self.is_virtual:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self._scroll("scroll", -3, "units")
+        else:
+            self._scroll("scroll", 3, "units")
+        return "break"
+
+    def _see(self, index=0):
+        """
+        Scrolls the list so the row of an entry is in view.
+        """
+        if self.is_virtual:
+            if not self.first_row <= index < self.first_row + len(self.rows):
+                self._show_window(index - len(self.rows) // 2)
+        elif index < len(self.rows):
+            self.history_tree.see(self.rows[index])
 
     def _clear_after_edit(self):
         """
         Clears the history array after the current index.
         """
-        self.history_arr = self.history_arr[:self.current_index + 1]
-        self.master.master.history = self.history_arr
+        self.history_arr.truncate(self.current_index + 1)
         self.master.master.undo_performed = False
         self._set_indices()
         self.update_history_list()
@@ -176,14 +258,26 @@ class History(Frame):
     def update_displayed_image(self):
         """
         Updates the displayed image by applying all edits to the original image.
+        Renders seen before come from the frame cache, and the entries either side are rendered ahead.
         """
         self.master.master.image_viewer._apply_all_edits()
+        self._prerender_neighbors()
+
+    def _prerender_neighbors(self):
+        """
+        Renders the entries before and after the current index in the background, so the next undo or redo is instant.
+        """
+        properties = []
+        for index in (self.current_index - 1, self.current_index + 1):
+            if self.starting_index <= index < self.history_length:
+                properties.append(self.history_arr.properties(index))
+        if properties:
+            self.master.master.image_viewer.prerender(properties)
 
     def _clear_history(self):
         """
         Clears the history array.
         """
         self.history_arr.clear()
-        self.master.master.history = self.history_arr
         self._set_indices()
         self.update_history_list()
@@ -0,0 +1,136 @@
+import os
+import cv2 as cv
+from PIL import Image
+
+
+class ImageIO:
+    # File extensions the editor can read and write
+    EXTENSIONS = (".png", ".jpeg", ".jpg", ".gif", ".bmp", ".tiff")
+
+    @staticmethod
+    def is_supported(path=None):
+        """
+        Returns True if the path has an image extension the editor can read and write.
+        """
+        return os.path.splitext(path)[1].lower() in ImageIO.EXTENSIONS
+
+    @staticmethod
+    def read_image(path=None):
+        """
+        Reads an image file. Gray images stay single channel, other images are read as 8-bit BGR.
+        GIF files are read as their first frame.
+
+        Parameters:
+            path (str): The path to the file.
+
+        Returns:
+            numpy.ndarray: The image, or None if it could not be read
+        """
+        if path.lower().endswith(".gif"):
+            return ImageIO.read_first_frame(path)
+        # IMREAD_ANYCOLOR keeps gray files single channel, drops alpha, reduces deeper
+        # images to 8 bits and applies the EXIF orientation, as cv.imread does by default
+        return cv.imread(path, cv.IMREAD_ANYCOLOR)
+
+    @staticmethod
+    def read_first_frame(path=None):
+        """
+        Reads the first frame of a GIF or video file as BGR.
+
+        Parameters:
+            path (str): The path to the file.
+
+        Returns:
+            numpy.ndarray: The first frame, or None if it could not be read
+        """
+        cap = cv.VideoCapture(path)
+        ret, first_frame = cap.read()
+        cap.release()
+        return first_frame if ret else None
+
+    @staticmethod
+    def read_image_info(path=None):
+        """
+        Reads the size of an image file from its header, without decoding the pixels.
+
+        Parameters:
+            path (str): The path to the file.
+
+        Returns:
+            tuple: The (width, height, is_gray) of the image, or None if it could not be read
+        """
+        try:
+            with Image.open(path) as img:
+                is_gray = img.mode in ("1", "L", "LA", "I", "F") or img.mode.startswith("I;16")
+                return img.size[0], img.size[1], is_gray
+        except Exception as e:
+            print(f"Error reading image header: {e}")
+            return None
+
+    @staticmethod
+    def read_reduced_image(path=None, factor=2, is_gray=False):
+        """
+        Reads an image file at a half, quarter or eighth of its size. JPEG files are decoded
+        straight at the reduced size, which is much faster than a full decode.
+
+        Parameters:
+            path (str): The path to the file.
+            factor (int): 2, 4 or 8.
+            is_gray (bool): Whether to read the image as a single channel.
+
+        Returns:
+            numpy.ndarray: The reduced image, or None if it could not be read
+        """
+        flags = {
+            2: (cv.IMREAD_REDUCED_COLOR_2, cv.IMREAD_REDUCED_GRAYSCALE_2),
+            4: (cv.IMREAD_REDUCED_COLOR_4, cv.IMREAD_REDUCED_GRAYSCALE_4),
+            8: (cv.IMREAD_REDUCED_COLOR_8, cv.IMREAD_REDUCED_GRAYSCALE_8),
+        }
+        return cv.imread(path, flags[factor][1 if is_gray else 0])
+
+    @staticmethod
+    def encode_image(extension=None, img=None):
+        """
+        Encodes an image into the bytes of an image file, for writing somewhere other than a file of its own.
+
+        Parameters:
+            extension (str): The extension of the format, such as ".png".
+            img (numpy.ndarray): The BGR or gray image to be encoded.
+
+        Returns:
+            bytes: The encoded file, or None if it could not be encoded
+        """
+        image = img
+        if extension.lower() == ".gif":
+            # Opencv cant encode GIF, imageio is only needed for this
+            import imageio
+            if image.ndim == 3:
+                image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+            return imageio.mimwrite(imageio.RETURN_BYTES, [image], format="GIF")
+
+        ret, encoded = cv.imencode(extension, image)
+        return encoded.tobytes() if ret else None
+
+    @staticmethod
+    def write_image(path=None, img=None):
+        """
+        Writes an image file, in the format given by the extension of the path.
+
+        Parameters:
+            path (str): The path to the file.
+            img (numpy.ndarray): The BGR or gray image to be written.
+
+        Returns:
+            bool: True if the file was written
+        """
+        image = img
+        if path.lower().endswith(".gif"):
+            # Opencv cant save images as GIF, imageio is only needed for this
+            import imageio
+            if image.ndim == 3:
+                # Change color values from BGR to RGB, gray images have no channel order to fix
+                image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+            imageio.mimsave(path, [image])
+            return True
+
+        return cv.imwrite(path, image)
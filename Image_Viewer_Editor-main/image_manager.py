@@ -1,19 +1,31 @@
-from tkinter import Frame, Canvas, CENTER
-from PIL import Image, ImageTk
+from tkinter import Frame, Canvas, Label, CENTER
 import cv2
 import math
+import dataclasses
 from tkinter import Frame, Button, Button
 from edit_functions import AllEditFunctions
-from image_properties import ImageProperties
+from edit_pipeline import EditPipeline
+from frame_cache import FrameCache
+from image_store import ImageStore
+from preview_proxy import PreviewProxy
+from render_scheduler import RenderScheduler
+from viewport import Viewport
+from image_pyramid import ImagePyramid
+from frame_presenter import FramePresenter
 import time
 
 
 class ImageManager(Frame):
+    # Zoom limits, high enough to inspect single pixels
+    MIN_ZOOM = 0.2
+    MAX_ZOOM = 32.0
+    # Milliseconds to wait after the window stops resizing before the image is fitted again
+    RESIZE_DELAY = 50
+
     def __init__(self, master=None):
         Frame.__init__(self, master=master, bg="black",
                        width=720, height=405)
 
-        self.current_image = None  # The current image being displayed
         self.crop_start_x = 0
         self.crop_start_y = 0
         self.crop_end_x = 0
@@ -59,15 +71,56 @@ class ImageManager(Frame):
             self, text="Reset", width=button_width, height=button_height, command=self._reset)
         self.pan_reset_button.pack(anchor="sw", side="left", padx=5, pady=5)
 
+        # Time taken to show the last frame
+        self.frame_time = 0.0
+        self.frame_time_label = Label(self, text="", bg="black", fg="#9b9b9b")
+        self.frame_time_label.pack(anchor="sw", side="left", padx=5, pady=5)
+
         # Zoom functionality
         self.scale_factor = 1.0
 
-    def display_image(self, img=None):
+        # Only the visible part of the zoomed image is rendered. The canvas keeps its size and
+        # canvas_width/canvas_height describe the area the image may be panned within.
+        self.display_source = None  # The image being displayed
+        self.display_scale = 1.0  # Size of display_source relative to the full resolution render
+        self.processed_scale = 1.0  # Size of the processed image relative to the full resolution render, below 1.0 while a large file loads
+        self.display_size = (0, 0)  # Size the whole image is shown at
+        self.display_origin = (0, 0)  # Canvas position of the top left corner of the whole image
+        self.view_rect = None  # Part of the displayed image that is rendered, (left, top, right, bottom)
+        self.view_pixels = None  # The rendered pixels of view_rect
+        # Keeps one canvas item and PhotoImage for the rendered pixels
+        self.presenter = FramePresenter(self.canvas)
+        # Halved copies of the processed image, so zoomed out views read from a small copy
+        self.pyramid = ImagePyramid()
+
+        # Fit the image again when the window is resized
+        self._resize_job = None
+        self._frame_size = (0, 0)
+        self.bind("<Configure>", self._on_resize)
+
+        # Keeps finished renders so going back and forth through the history does not render again
+        self.frame_cache = FrameCache()
+        # Caches the output of every edit so only changed stages are re-run
+        self.edit_pipeline = EditPipeline(self.frame_cache)
+        # Renders the neighbors of the current history entry into the frame cache, with its own
+        # stage cache so it does not hold up or throw away the stages of the shown render
+        self.prerender_pipeline = EditPipeline(self.frame_cache)
+        self.prerender_scheduler = RenderScheduler(
+            self, self._prerender, self._prerendered)
+        # Renders slider previews on a copy of the original sized to the viewport
+        self.preview_proxy = PreviewProxy()
+        # Runs renders off the Tk thread, only the newest one is shown
+        self.render_scheduler = RenderScheduler(
+            self, self._render, self._show_render)
+
+    def display_image(self, img=None, scale=None):
         """
         Displays the image on the canvas.
 
         Parameters:
             img (numpy.ndarray): The image to be displayed.
+            scale (float): Size of img relative to the full resolution render, below 1.0 for previews.
+                Defaults to the scale of the processed image when that is displayed, otherwise 1.0.
 
         Returns:
             None
@@ -75,15 +128,18 @@ class ImageManager(Frame):
         self.clear_canvas()
         if img is None:
             # Use the processed image if none is given
-            image = self.master.master.processed_image.copy()
+            image = self.master.master.processed_image
         else:
             image = img
+        if scale is None:
+            scale = self.processed_scale if image is self.master.master.processed_image else 1.0
 
         zoom = self.master.master.image_properties.is_zoomed
 
-        # Convert the image from BGR to RGB
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        height, width = image.shape[:2]
+        # Sizes are worked out for the full resolution render so previews
+        # are shown at the same size
+        height = int(round(image.shape[0] / scale))
+        width = int(round(image.shape[1] / scale))
         ratio = height / width
 
         self.master.master.image_properties.altered_image_height = height
@@ -102,38 +158,136 @@ class ImageManager(Frame):
                 new_height = self.winfo_height()
                 new_width = int(math.floor(new_height * (width / height)))
 
-        canvas_center_x = (self.canvas_width / 2)
-        canvas_center_y = (self.canvas_height / 2)
+        # If the image is zoomed, show it at the zoom scale factor
+        display_width, display_height = new_width, new_height
+        if zoom:
+            display_width = int(new_width * self.scale_factor)
+            display_height = int(new_height * self.scale_factor)
+            self.master.master.image_properties.zoom_image_height = display_height
+            self.master.master.image_properties.zoom_image_width = display_width
 
-        image_center_x = (canvas_center_x - new_width / 2)
-        image_center_y = (canvas_center_y - new_height / 2)
+        self.ratio = height / new_height
 
-        # If the image is zoomed, resize the image to reflect the zoom scale factor
-        if zoom:
-            size = int(
-                new_width * self.scale_factor), int(new_height * self.scale_factor)
-            self.current_image = cv2.resize(image, size)
-            self.master.master.image_properties.zoom_image_height = size[1]
-            self.master.master.image_properties.zoom_image_width = size[0]
-            image_center_x = (canvas_center_x -
-                              (new_width * self.scale_factor) / 2)
-            image_center_y = (canvas_center_y -
-                              (new_height * self.scale_factor) / 2)
-        else:
-            self.current_image = cv2.resize(image, (new_width, new_height))
+        self.canvas.config(width=self.original_canvas_width,
+                           height=self.original_canvas_height)
 
-        self.current_image = ImageTk.PhotoImage(
-            Image.fromarray(self.current_image))
+        display_size = (max(1, display_width), max(1, display_height))
+        if image is not self.display_source or display_size != self.display_size:
+            # The rendered pixels only carry over for the same image at the same size
+            self.view_rect = None
+            self.view_pixels = None
+        self.display_source = image
+        self.display_scale = scale
+        self.display_size = display_size
+        self.display_origin = (
+            self.original_canvas_width / 2 - display_width / 2 +
+            self.master.master.image_properties.pan_coord_x,
+            self.original_canvas_height / 2 - display_height / 2 +
+            self.master.master.image_properties.pan_coord_y)
+        self._render_viewport()
 
-        self.ratio = height / new_height
+    def _visible_rect(self):
+        """
+        Returns the part of the canvas inside the frame, (left, top, right, bottom) in canvas coordinates.
+        """
+        canvas_width = self.original_canvas_width
+        canvas_height = self.original_canvas_height
+        frame_width = self.winfo_width()
+        frame_height = self.winfo_height()
+        if frame_width <= 1 or frame_height <= 1:
+            # Not mapped yet
+            return (0, 0, canvas_width, canvas_height)
+        # The canvas is centered in the frame
+        left = max(0, (canvas_width - frame_width) / 2)
+        top = max(0, (canvas_height - frame_height) / 2)
+        return (left, top, min(canvas_width, left + frame_width), min(canvas_height, top + frame_height))
+
+    def _image_bbox(self):
+        """
+        Returns where the whole displayed image lies on the canvas, including the parts that are not rendered.
+        """
+        origin_x, origin_y = self.display_origin
+        return (origin_x, origin_y, origin_x + self.display_size[0], origin_y + self.display_size[1])
+
+    def _pan_bounds(self):
+        """
+        Returns the area the image may be panned within, in canvas coordinates. It grows with the zoom.
+        """
+        left = (self.original_canvas_width - self.canvas_width) / 2
+        top = (self.original_canvas_height - self.canvas_height) / 2
+        return (left, top, left + self.canvas_width, top + self.canvas_height)
 
-        self.canvas.config(width=self.canvas_width, height=self.canvas_height)
+    def _render_viewport(self):
+        """
+        Renders the visible part of the displayed image plus a margin. Parts rendered already are
+        reused, so panning only renders the strips that come into view.
+        """
+        if self.display_source is None:
+            return
+        start = time.perf_counter()
+        origin_x, origin_y = self.display_origin
+        visible = self._visible_rect()
+        # Visible part in displayed image pixels
+        needed = Viewport.intersect(
+            (int(math.floor(visible[0] - origin_x)), int(math.floor(visible[1] - origin_y)),
+             int(math.ceil(visible[2] - origin_x)), int(math.ceil(visible[3] - origin_y))),
+            (0, 0) + self.display_size)
+        if needed is None:
+            self.presenter.hide()
+            return
 
-        self.canvas.create_image(
-            image_center_x, image_center_y, anchor="nw", image=self.current_image)
+        if not Viewport.contains(self.view_rect, needed):
+            margin = Viewport.MARGIN
+            rect = Viewport.intersect((needed[0] - margin, needed[1] - margin,
+                                       needed[2] + margin, needed[3] + margin),
+                                      (0, 0) + self.display_size)
+            self.view_pixels = Viewport.update(self._display_level(), self.display_size, rect,
+                                               self.view_pixels, self.view_rect)
+            self.view_rect = rect
 
-        self.canvas.move("all", self.master.master.image_properties.pan_coord_x,
-                         self.master.master.image_properties.pan_coord_y)
+        # Unchanged pixels are only moved, not uploaded again
+        self.presenter.show(self.view_pixels, origin_x + self.view_rect[0], origin_y + self.view_rect[1])
+        self.frame_time = (time.perf_counter() - start) * 1000
+        self.frame_time_label.config(text=f"{self.frame_time:.1f} ms")
+
+    def _display_level(self):
+        """
+        Returns the image to sample the display from, the nearest pyramid level for the processed image.
+        Previews are shown from the image itself, they are small already and change with every slider move.
+        """
+        if self.display_source is not self.master.master.processed_image:
+            return self.display_source
+        return self.pyramid.level(self.display_source, *self.display_size)
+
+    def _on_resize(self, event):
+        """
+        Schedules the image to be fitted again once the window stops resizing.
+        """
+        if (event.width, event.height) == self._frame_size:
+            return
+        self._frame_size = (event.width, event.height)
+        if self._resize_job is not None:
+            self.after_cancel(self._resize_job)
+        self._resize_job = self.after(ImageManager.RESIZE_DELAY, self._refit)
+
+    def _refit(self):
+        """
+        Shows the current image again at the new window size, sampling from the cached pyramid.
+        """
+        self._resize_job = None
+        if self.display_source is not None:
+            self.display_image(self.display_source, self.display_scale)
+
+    def _move_image(self, dx=0, dy=0):
+        """
+        Pans the image by the given amount and renders any part that comes into view.
+        """
+        if dx == 0 and dy == 0:
+            return
+        self.master.master.image_properties.pan_coord_x += dx
+        self.master.master.image_properties.pan_coord_y += dy
+        self.display_origin = (self.display_origin[0] + dx, self.display_origin[1] + dy)
+        self._render_viewport()
 
     def _activate_pan(self, event):
         """
@@ -173,28 +327,27 @@ class ImageManager(Frame):
         dest_x = event.x - self.start_x
         dest_y = event.y - self.start_y
 
-        # Get the bounding box of all elements on the canvas
-        bbox = self.canvas.bbox("all")
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
+        # The pan is limited by where the whole image lies, not just the rendered part
+        bbox = self._image_bbox()
+        left, top, right, bottom = self._pan_bounds()
+        move_x = 0
+        move_y = 0
 
         if dest_x > 0:
-            if bbox[2] + dest_x <= canvas_width:
-                self.canvas.move("all", dest_x, 0)
-                self.master.master.image_properties.pan_coord_x += dest_x
+            if bbox[2] + dest_x <= right:
+                move_x = dest_x
         else:
-            if bbox[0] + dest_x >= 0:
-                self.canvas.move("all", dest_x, 0)
-                self.master.master.image_properties.pan_coord_x += dest_x
+            if bbox[0] + dest_x >= left:
+                move_x = dest_x
 
         if dest_y > 0:
-            if bbox[3] + dest_y <= canvas_height:
-                self.canvas.move("all", 0, dest_y)
-                self.master.master.image_properties.pan_coord_y += dest_y
+            if bbox[3] + dest_y <= bottom:
+                move_y = dest_y
         else:
-            if bbox[1] + dest_y >= 0:
-                self.canvas.move("all", 0, dest_y)
-                self.master.master.image_properties.pan_coord_y += dest_y
+            if bbox[1] + dest_y >= top:
+                move_y = dest_y
+
+        self._move_image(move_x, move_y)
 
         self.start_x = event.x
         self.start_y = event.y
@@ -210,16 +363,14 @@ class ImageManager(Frame):
         Returns:
             None
         """
-        current_x, current_y = self.canvas.coords("all")
-        if current_x-(self.canvas.winfo_width()*.1) >= 0:
-            self.canvas.move("all", -(self.canvas.winfo_width()*.1), 0)
-            self.start_x -= (self.canvas.winfo_width()*.1)
-            self.master.master.image_properties.pan_coord_x -= (
-                self.canvas.winfo_width()*.1)
-        if current_x-(self.canvas.winfo_width()*.1) < 0:
-            self.canvas.move("all", -current_x, 0)
+        step = self.canvas_width * .1
+        current_x = self._image_bbox()[0] - self._pan_bounds()[0]
+        if current_x - step >= 0:
+            self.start_x -= step
+            self._move_image(-step, 0)
+        else:
             self.start_x -= current_x
-            self.master.master.image_properties.pan_coord_x -= current_x
+            self._move_image(-current_x, 0)
 
     def _pan_right(self, event):
         """
@@ -231,18 +382,14 @@ class ImageManager(Frame):
         Returns:
             None
         """
-        # Get the bounding box of all elements on the canvas
-        bbox = self.canvas.bbox("all")
-        if bbox[2]+(self.canvas.winfo_width()*.1) <= self.canvas.winfo_width():
-            self.canvas.move("all", +(self.canvas.winfo_width()*.1), 0)
-            self.start_x += (self.canvas.winfo_width()*.1)
-            self.master.master.image_properties.pan_coord_x += (
-                self.canvas.winfo_width()*.1)
-        if bbox[2]+(self.canvas.winfo_width()*.1) > self.canvas.winfo_width():
-            self.canvas.move("all", self.canvas.winfo_width()-bbox[2], 0)
-            self.start_x += self.canvas.winfo_width()-bbox[2]
-            self.master.master.image_properties.pan_coord_x += self.canvas.winfo_width() - \
-                bbox[2]
+        step = self.canvas_width * .1
+        space = self._pan_bounds()[2] - self._image_bbox()[2]
+        if step <= space:
+            self.start_x += step
+            self._move_image(step, 0)
+        else:
+            self.start_x += space
+            self._move_image(space, 0)
 
     def _pan_down(self, event):
         """
@@ -254,18 +401,14 @@ class ImageManager(Frame):
         Returns:
             None
         """
-        # Get the bounding box of all elements on the canvas
-        bbox = self.canvas.bbox("all")
-        if bbox[3]+(self.canvas.winfo_height()*.1) <= self.canvas.winfo_height():
-            self.canvas.move("all", 0, +(self.canvas.winfo_height()*.1))
-            self.start_y += (self.canvas.winfo_height()*.1)
-            self.master.master.image_properties.pan_coord_y += (
-                self.canvas.winfo_height()*.1)
-        if bbox[3]+(self.canvas.winfo_height()*.1) > self.canvas.winfo_height():
-            self.canvas.move("all", 0, self.canvas.winfo_height()-bbox[3])
-            self.start_y += self.canvas.winfo_height()-bbox[3]
-            self.master.master.image_properties.pan_coord_y += self.canvas.winfo_height() - \
-                bbox[3]
+        step = self.canvas_height * .1
+        space = self._pan_bounds()[3] - self._image_bbox()[3]
+        if step <= space:
+            self.start_y += step
+            self._move_image(0, step)
+        else:
+            self.start_y += space
+            self._move_image(0, space)
 
     def _pan_up(self, event):
         """
@@ -277,16 +420,14 @@ class ImageManager(Frame):
         Returns:
             None
         """
-        current_x, current_y = self.canvas.coords("all")
-        if current_y-(self.canvas.winfo_height()*.1) >= 0:
-            self.canvas.move("all", 0, -(self.canvas.winfo_height()*.1))
-            self.start_y -= (self.canvas.winfo_height()*.1)
-            self.master.master.image_properties.pan_coord_y -= (
-                self.canvas.winfo_height()*.1)
-        if current_y-(self.canvas.winfo_height()*.1) < 0:
-            self.canvas.move("all", 0, -current_y)
+        step = self.canvas_height * .1
+        current_y = self._image_bbox()[1] - self._pan_bounds()[1]
+        if current_y - step >= 0:
+            self.start_y -= step
+            self._move_image(0, -step)
+        else:
             self.start_y -= current_y
-            self.master.master.image_properties.pan_coord_y -= current_y
+            self._move_image(0, -current_y)
 
     def _reset(self):
         """
@@ -300,7 +441,18 @@ class ImageManager(Frame):
         self.canvas_height = self.original_canvas_height
         self.master.master.image_properties.pan_coord_x = 0
         self.master.master.image_properties.pan_coord_y = 0
-        self.display_image()
+        self._redisplay()
+
+    def _redisplay(self):
+        """
+        Shows the current image again after the zoom changed. A slider preview stays on screen and is
+        rendered again for the new zoom, rather than the processed image from before the sliders moved.
+        """
+        if self.display_source is not None and self.display_source is not self.master.master.processed_image:
+            self.display_image(self.display_source, self.display_scale)
+            self._apply_all_edits(preview=True)
+        else:
+            self.display_image()
 
     def _active_crop_mode(self, event):
         """
@@ -350,8 +502,8 @@ class ImageManager(Frame):
         """
         self.master.master.image_properties.is_cropped = True
         current_location = len(self.master.master.history) - 1
-        add_x = self.master.master.history[current_location].crop_start_x
-        add_y = self.master.master.history[current_location].crop_start_y
+        add_x = self.master.master.history.value(current_location, "crop_start_x")
+        add_y = self.master.master.history.value(current_location, "crop_start_y")
 
         new_crop_start_x = start_x + add_x
         new_crop_start_y = start_y + add_y
@@ -447,6 +599,9 @@ class ImageManager(Frame):
         Returns:
             None
         """
+        # The crop is measured against the full resolution processed image, so wait for it to be current
+        self.master.master.app_options.loader.flush()
+        self.render_scheduler.flush()
         self._check_crop_coordinates()
 
         if self.crop_start_x <= self.crop_end_x and self.crop_start_y <= self.crop_end_y:
@@ -475,8 +630,11 @@ class ImageManager(Frame):
 
         # Check if the crop is valid
         try:
-            image = cv2.cvtColor(
-                self.master.master.processed_image[y, x], cv2.COLOR_BGR2RGB)
+            image = self.master.master.processed_image[y, x]
+            if image.ndim == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            elif image.size == 0:
+                raise cv2.error("Crop area is empty")
         except cv2.error as e:
             print(e)
             self.canvas.delete(self.rectangle_id)
@@ -495,37 +653,109 @@ class ImageManager(Frame):
         self._apply_all_edits()
 
     def _perform_crop_to_image(self, img=None):
-        image = img
-        if self.master.master.image_properties.crop_start_x == 0 or self.master.master.image_properties.crop_start_y == 0 or self.master.master.image_properties.crop_end_x == 0 or self.master.master.image_properties.crop_end_y == 0:
-            return image
-
-        original_crop_ratio = self.master.master.image_properties.crop_ratio
-        original_start_x = int(
-            self.master.master.image_properties.crop_start_x)
-        original_start_y = int(
-            self.master.master.image_properties.crop_start_y)
-        original_end_x = int(self.master.master.image_properties.crop_end_x)
-        original_end_y = int(self.master.master.image_properties.crop_end_y)
-
-        x = slice(original_start_x, original_end_x, 1)
-        y = slice(original_start_y, original_end_y, 1)
-
-        image = image[y, x]
-        return image
-
-    def _apply_all_edits(self):
-        image = self.master.master.original_image
-        image = self._perform_crop_to_image(image)
-        image = AllEditFunctions._apply_all_basic_edits(
-            self.master.master.image_properties, image)
-        image = AllEditFunctions._apply_all_advanced_edits(
-            self.master.master.image_properties, image)
+        return AllEditFunctions._apply_crop_to_image(
+            self.master.master.image_properties, img)
+
+    def _apply_all_edits(self, preview=False, block=False):
+        """
+        Applies all edits to the original image and displays the result.
+        The render runs on a worker thread unless block is True.
+
+        Parameters:
+            preview (bool): If True, only a preview sized to the viewport is rendered and displayed.
+                The processed image is left as it was until a full render.
+            block (bool): If True, the render runs on the calling thread and is displayed before returning.
+
+        Returns:
+            None
+        """
+        # Render from a snapshot so later edits cannot change a render in progress
+        image_properties = dataclasses.replace(
+            self.master.master.image_properties)
+        source_shape = (image_properties.original_image_height,
+                        image_properties.original_image_width)
+        render_args = (image_properties, self.master.master.original_image, source_shape, preview,
+                       self.winfo_width(), self.winfo_height(), self.scale_factor)
+
+        if block:
+            self.render_scheduler.cancel()
+            self._show_render(self._render(*render_args))
+        else:
+            self.render_scheduler.submit(*render_args)
+
+    def _render(self, img_properties, img, source_shape, preview, viewport_width, viewport_height, zoom):
+        """
+        Renders the edits. Called on the render worker thread unless blocking.
+
+        Returns:
+            tuple: The rendered image, its scale relative to a full resolution render and whether it is a preview
+        """
+        if img.shape[:2] != source_shape:
+            # The original is still reduced while the full resolution is decoded
+            image, scale = self.preview_proxy.render_reduced(img_properties, img, source_shape)
+            return image, scale, preview
+
+        if preview:
+            image, scale = self.preview_proxy.render(
+                img_properties, img, viewport_width, viewport_height, zoom)
+            if image is not None:
+                return image, scale, True
+
+        return self.edit_pipeline.run(img_properties, img), 1.0, False
+
+    def prerender(self, properties=None):
+        """
+        Renders the edits of each image properties into the frame cache in the background,
+        so they are shown at once when they are applied. Replaces any prerender not started yet.
+
+        Parameters:
+            properties (list): The ImageProperties to render, most likely to be needed first
+
+        Returns:
+            None
+        """
+        image_properties = [dataclasses.replace(item) for item in properties]
+        source_shape = (self.master.master.image_properties.original_image_height,
+                        self.master.master.image_properties.original_image_width)
+        self.prerender_scheduler.submit(image_properties, self.master.master.original_image, source_shape)
+
+    def _prerender(self, properties, img, source_shape):
+        """
+        Renders into the frame cache. Called on the prerender worker thread.
+        """
+        # Reduced originals are not cached and disk backed frames would not fit the cache
+        if img is None or img.shape[:2] != source_shape or ImageStore.is_out_of_core(img):
+            return None
+        for image_properties in properties:
+            # The render the user is waiting for comes first
+            self.render_scheduler.wait()
+            self.prerender_pipeline.run(image_properties, img)
+        self.prerender_pipeline.clear()
+        self.frame_cache.compress_cold()
+        return None
+
+    def _prerendered(self, result=None):
+        """
+        Prerenders only fill the frame cache, there is nothing to show.
+        """
+
+    def _show_render(self, result):
+        """
+        Displays a finished render, and keeps it as the processed image unless it is a preview.
+        """
+        image, scale, preview = result
+        if preview:
+            self.display_image(image, scale)
+            return
+
         self.master.master.processed_image = image
+        self.processed_scale = scale
         self.master.master.app_options._update_metadata()
         self.display_image(self.master.master.processed_image)
 
     def clear_canvas(self):
-        self.canvas.delete("all")
+        # The frame item is kept and reused, everything drawn over it is removed
+        self.canvas.delete("!" + FramePresenter.TAG)
 
     def _set_zoom_bool(self):
         if self.scale_factor == 1.0:
@@ -535,45 +765,45 @@ class ImageManager(Frame):
 
     def _zoom(self, event):
         if event.keysym == 'KP_Add' or event.delta == 120:
-            if self.scale_factor >= 2.2:
-                self.scale_factor = 2.2
+            if self.scale_factor >= ImageManager.MAX_ZOOM:
+                self.scale_factor = ImageManager.MAX_ZOOM
                 return
-            self.scale_factor *= 1.2
+            self.scale_factor = min(self.scale_factor * 1.2, ImageManager.MAX_ZOOM)
             self._set_zoom_bool()
         elif event.keysym == 'minus' or event.delta == -120:
-            if self.scale_factor <= 0.2:
-                self.scale_factor = 0.2
+            if self.scale_factor <= ImageManager.MIN_ZOOM:
+                self.scale_factor = ImageManager.MIN_ZOOM
                 return
             self.scale_factor *= 0.8
             self._set_zoom_bool()
         self.master.master.app_options._update_metadata()
         self._zoom_canvas_adj()
-        self.display_image()
+        self._redisplay()
 
     def _zoom_in(self, event):
-        if self.scale_factor >= 2.2:
-            self.scale_factor = 2.2
+        if self.scale_factor >= ImageManager.MAX_ZOOM:
+            self.scale_factor = ImageManager.MAX_ZOOM
             return
-        self.scale_factor *= 1.2
+        self.scale_factor = min(self.scale_factor * 1.2, ImageManager.MAX_ZOOM)
         self._set_zoom_bool()
         self._zoom_canvas_adj()
-        self.display_image()
+        self._redisplay()
 
     def _zoom_out(self, event):
-        if self.scale_factor <= 0.2:
-            self.scale_factor = 0.2
+        if self.scale_factor <= ImageManager.MIN_ZOOM:
+            self.scale_factor = ImageManager.MIN_ZOOM
             return
         self.scale_factor *= 0.8
         self._set_zoom_bool()
         self._zoom_canvas_adj()
-        self.display_image()
+        self._redisplay()
 
     def _zoom_canvas_adj(self):
+        # The canvas keeps its size, only the area the image may be panned within grows
         if self.scale_factor <= 1.0:
             return
         self.canvas_width = self.original_canvas_width * self.scale_factor
         self.canvas_height = self.original_canvas_height * self.scale_factor
-        self.canvas.config(width=self.canvas_width, height=self.canvas_height)
 
     def _check_undo_performed(self):
         if self.master.master.undo_performed:
@@ -591,46 +821,7 @@ class ImageManager(Frame):
         Returns:
             None
         """
-        edit_instance = self._make_edit_instance(title)
         self._check_undo_performed()
-        self.master.master.history.append(edit_instance)
+        self.master.master.history.record(self.master.master.image_properties, title)
         self.master.master.history_of_edits.update_history_list()
         self.master.master.history_of_edits._set_indices()
-
-    def _make_edit_instance(self, title):
-        """
-        Creates an edit instance with the current self.master.master.image_properties values.
-        """
-        edit_instance = ImageProperties(
-            title=title,
-            time=str(time.strftime('%H:%M:%S')),
-            is_flipped_horz=self.master.master.image_properties.is_flipped_horz,
-            is_flipped_vert=self.master.master.image_properties.is_flipped_vert,
-            is_grayscaled=self.master.master.image_properties.is_grayscaled,
-            is_sepia=self.master.master.image_properties.is_sepia,
-            is_cropped=self.master.master.image_properties.is_cropped,
-            is_resized=self.master.master.image_properties.is_resized,
-            original_image_height=self.master.master.image_properties.original_image_height,
-            original_image_width=self.master.master.image_properties.original_image_width,
-            altered_image_height=self.master.master.image_properties.altered_image_height,
-            altered_image_width=self.master.master.image_properties.altered_image_width,
-            resize_image_height=self.master.master.image_properties.resize_image_height,
-            resize_image_width=self.master.master.image_properties.resize_image_width,
-            zoom_scale_factor=self.master.master.image_properties.zoom_scale_factor,
-            rotation=self.master.master.image_properties.rotation,
-            brightness=self.master.master.image_properties.brightness,
-            contrast=self.master.master.image_properties.contrast,
-            saturation=self.master.master.image_properties.saturation,
-            blur=self.master.master.image_properties.blur,
-            hue=self.master.master.image_properties.hue,
-            crop_start_x=self.master.master.image_properties.crop_start_x,
-            crop_start_y=self.master.master.image_properties.crop_start_y,
-            crop_end_x=self.master.master.image_properties.crop_end_x,
-            crop_end_y=self.master.master.image_properties.crop_end_y,
-            crop_ratio=self.master.master.image_properties.crop_ratio,
-            crop_rectangle_height=self.master.master.image_properties.crop_rectangle_height,
-            crop_rectangle_width=self.master.master.image_properties.crop_rectangle_width,
-            at_time_canvas_height=self.master.master.image_properties.at_time_canvas_height,
-            at_time_canvas_width=self.master.master.image_properties.at_time_canvas_width
-        )
-        return edit_instance
@@ -0,0 +1,70 @@
+import threading
+import cv2
+from image_store import ImageStore
+
+
+class ImagePyramid:
+    def __init__(self):
+        """
+        Halved copies of an image, built as they are needed. Showing the image smaller than its
+        full size then reads from the nearest copy that is still large enough, instead of from full resolution.
+        """
+        self.source = None  # The image the levels were made from
+        self.levels = []  # The source followed by each halved copy
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """
+        Drops every level.
+        """
+        with self._lock:
+            self.source = None
+            self.levels = []
+
+    @staticmethod
+    def _half(img=None):
+        """
+        Returns the image at half its size, averaging each 2x2 block. Large images are halved
+        one band of rows at a time into a disk backed image.
+        """
+        image = img
+        height, width = image.shape[:2]
+        # An even size makes every output pixel exactly one 2x2 block, so bands line up
+        image = image[:height - height % 2, :width - width % 2]
+        output = ImageStore.empty((height // 2, width // 2) + image.shape[2:], image.dtype)
+        rows = max(2, ImageStore.band_rows(image) // 2 * 2)
+        for start in range(0, image.shape[0], rows):
+            band = image[start:start + rows]
+            output[start // 2:(start + band.shape[0]) // 2] = cv2.resize(
+                band, (width // 2, band.shape[0] // 2), interpolation=cv2.INTER_AREA)
+        return output
+
+    def level(self, img=None, width=0, height=0):
+        """
+        Returns the smallest level of the image that is at least width x height, building it if needed.
+        The levels are rebuilt when a different image is given.
+
+        Parameters:
+            img (numpy.ndarray): The full resolution image
+            width (int): The width the image is shown at
+            height (int): The height the image is shown at
+
+        Returns:
+            numpy.ndarray: The level to sample from
+        """
+        with self._lock:
+            if img is not self.source:
+                self.source = img
+                self.levels = [img]
+
+            index = 0
+            while True:
+                if index + 1 >= len(self.levels):
+                    level_height, level_width = self.levels[index].shape[:2]
+                    if level_width // 2 < max(1, width) or level_height // 2 < max(1, height):
+                        return self.levels[index]
+                    self.levels.append(ImagePyramid._half(self.levels[index]))
+                next_height, next_width = self.levels[index + 1].shape[:2]
+                if next_width < width or next_height < height:
+                    return self.levels[index]
+                index += 1
@@ -0,0 +1,144 @@
+import tempfile
+import numpy as np
+
+
+class ImageStore:
+    # Memory the editor may use for image data, in bytes
+    MEMORY_BUDGET = 2 << 30
+    # Images kept at once (original, processed, cached steps and the display), each gets an equal share
+    IMAGE_COPIES = 4
+    # Fraction of the budget a single band of rows may use while streaming
+    BAND_FRACTION = 1 / 64
+    # Directory for the backing files, None uses the system temporary directory
+    DIRECTORY = None
+
+    @staticmethod
+    def set_memory_budget(budget=None):
+        """
+        Sets how much memory images may use before they are moved to disk.
+
+        Parameters:
+            budget (int): The budget in bytes
+
+        Returns:
+            None
+        """
+        ImageStore.MEMORY_BUDGET = int(budget)
+
+    @staticmethod
+    def _nbytes(shape=None, dtype=np.uint8):
+        """
+        Returns the size in bytes of an image with the given shape and type.
+        """
+        return int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+
+    @staticmethod
+    def fits_in_memory(shape=None, dtype=np.uint8):
+        """
+        Returns True if an image of the given shape and type fits in its share of the memory budget.
+        """
+        return ImageStore._nbytes(shape, dtype) <= ImageStore.MEMORY_BUDGET // ImageStore.IMAGE_COPIES
+
+    @staticmethod
+    def is_out_of_core(img=None):
+        """
+        Returns True if the image is too large to be held in memory and should be streamed in bands.
+        """
+        return not ImageStore.fits_in_memory(img.shape, img.dtype)
+
+    @staticmethod
+    def band_rows(img=None):
+        """
+        Returns how many rows of the image can be processed at once within the memory budget.
+        """
+        row_bytes = max(1, ImageStore._nbytes(img.shape[1:], img.dtype))
+        band_bytes = int(ImageStore.MEMORY_BUDGET * ImageStore.BAND_FRACTION)
+        return max(1, band_bytes // row_bytes)
+
+    @staticmethod
+    def empty(shape=None, dtype=np.uint8):
+        """
+        Allocates an image, backed by a temporary file if it does not fit in memory.
+
+        Parameters:
+            shape (tuple): The shape of the image
+            dtype (numpy.dtype): The pixel type
+
+        Returns:
+            numpy.ndarray: The uninitialized image, a numpy.memmap when it is disk backed
+        """
+        if ImageStore.fits_in_memory(shape, dtype):
+            return np.empty(shape, dtype=dtype)
+        # The file has no name and is removed once the last mapping of it is closed
+        backing_file = tempfile.TemporaryFile(dir=ImageStore.DIRECTORY)
+        return np.memmap(backing_file, dtype=dtype, mode="w+", shape=tuple(shape))
+
+    @staticmethod
+    def _copy(img=None):
+        """
+        Copies the image into a new image one band of rows at a time.
+        """
+        image = img
+        output = ImageStore.empty(image.shape, image.dtype)
+        rows = ImageStore.band_rows(image)
+        for start in range(0, image.shape[0], rows):
+            output[start:start + rows] = image[start:start + rows]
+        return output
+
+    @staticmethod
+    def contiguous(img=None):
+        """
+        Returns the image in C-contiguous memory, copying it in bands into a disk backed image if it is too large.
+
+        Parameters:
+            img (numpy.ndarray): The image, possibly a strided view
+
+        Returns:
+            numpy.ndarray: A C-contiguous image
+        """
+        image = img
+        if image.flags.c_contiguous:
+            return image
+        if not ImageStore.is_out_of_core(image):
+            return np.ascontiguousarray(image)
+
+        return ImageStore._copy(image)
+
+    @staticmethod
+    def store(img=None):
+        """
+        Moves a decoded image to disk if it does not fit in memory, otherwise returns it unchanged.
+
+        Parameters:
+            img (numpy.ndarray): The decoded image
+
+        Returns:
+            numpy.ndarray: The image, a numpy.memmap if it was moved to disk
+        """
+        image = img
+        if image is None or isinstance(image, np.memmap) or not ImageStore.is_out_of_core(image):
+            return image
+
+        output = ImageStore._copy(image)
+        output.flush()
+        return output
+
+    @staticmethod
+    def sample(img=None, width=0, height=0):
+        """
+        Returns a copy of the image reduced by a whole step so it is still at least width x height.
+        Only every step-th row is read, so a disk backed image is not loaded in full.
+
+        Parameters:
+            img (numpy.ndarray): The image to be sampled
+            width (int): The smallest width needed
+            height (int): The smallest height needed
+
+        Returns:
+            numpy.ndarray: The sampled image
+        """
+        image = img
+        step = max(1, min(image.shape[1] // max(1, width), image.shape[0] // max(1, height)))
+        if step == 1:
+            return np.ascontiguousarray(image)
+        return np.ascontiguousarray(image[::step, ::step])
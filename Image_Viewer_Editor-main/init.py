@@ -1,5 +1,7 @@
 from main import Main
 
-root = Main()
+# Batch worker processes import this module again, they must not open a window
+if __name__ == "__main__":
+    root = Main()
 
-root.mainloop()
\ No newline at end of file
+    root.mainloop()
@@ -4,6 +4,7 @@ from app_options import AppOptions  # tried to make a button
 from image_manager import ImageManager
 from editor_options import EditorOptions
 from history_of_edits import History
+from edit_history import EditHistory
 
 
 class Main(tk.Tk):
@@ -19,7 +20,7 @@ class Main(tk.Tk):
         self.in_crop_mode = False
 
         self.undo_performed = False
-        self.history = []
+        self.history = EditHistory()
         self.item_clicked = False
 
         self.is_saved = False
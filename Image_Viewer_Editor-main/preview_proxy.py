@@ -0,0 +1,143 @@
+import dataclasses
+import threading
+import cv2
+from edit_pipeline import EditPipeline
+from edit_planner import EditPlanner
+from image_store import ImageStore
+
+
+class PreviewProxy:
+    # Proxies are only used when they are at most this fraction of the full resolution
+    MAX_PROXY_SCALE = 0.75
+
+    def __init__(self):
+        """
+        Renders edits on a downscaled copy of the original image, sized to what the viewport can show.
+        """
+        self.source = None  # The full resolution original the proxy was made from
+        self.scale = 1.0  # Size of the proxy relative to the original
+        self.image = None  # The downscaled original
+        # Separate cache, the proxy results differ from full renders. Large blurs are approximated
+        self.edit_pipeline = EditPipeline(preview=True)
+        self._lock = threading.Lock()  # Guards the cached proxy
+
+    @staticmethod
+    def proxy_scale(img_properties=None, shape=None, viewport_width=0, viewport_height=0, zoom=1.0):
+        """
+        Returns how much the original can be shrunk while still filling the viewport at the given zoom.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            shape (tuple): The shape of the original image
+            viewport_width (int): Width of the area the image is shown in
+            viewport_height (int): Height of the area the image is shown in
+            zoom (float): The current zoom scale factor
+
+        Returns:
+            float: The proxy scale, 1.0 if the full resolution is needed
+        """
+        output_height, output_width = EditPlanner.output_shape(
+            dataclasses.replace(img_properties), shape)
+        if output_width <= 0 or output_height <= 0 or viewport_width <= 1 or viewport_height <= 1:
+            return 1.0
+
+        fit = min(viewport_width / output_width, viewport_height / output_height)
+        scale = fit * max(zoom, 1.0)
+        if scale > PreviewProxy.MAX_PROXY_SCALE:
+            return 1.0
+        return scale
+
+    @staticmethod
+    def scale_properties(img_properties=None, scale=1.0):
+        """
+        Returns a copy of the image properties with every pixel measurement multiplied by the scale.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            scale (float): Size of the proxy relative to the original
+
+        Returns:
+            ImageProperties: The scaled copy
+        """
+        image_properties = img_properties
+        return dataclasses.replace(
+            image_properties,
+            crop_start_x=PreviewProxy._scale_crop(image_properties.crop_start_x, scale),
+            crop_start_y=PreviewProxy._scale_crop(image_properties.crop_start_y, scale),
+            crop_end_x=PreviewProxy._scale_crop(image_properties.crop_end_x, scale),
+            crop_end_y=PreviewProxy._scale_crop(image_properties.crop_end_y, scale),
+            resize_image_width=max(1, round(image_properties.resize_image_width * scale)),
+            resize_image_height=max(1, round(image_properties.resize_image_height * scale)),
+            blur=round(image_properties.blur * scale))
+
+    @staticmethod
+    def _scale_crop(value=0, scale=1.0):
+        """
+        Scales a crop coordinate to whole proxy pixels. A coordinate of 0 means there is no crop,
+        so a crop edge near the border is kept at 1 rather than rounded away to 0.
+        """
+        if value == 0:
+            return 0
+        return max(1, round(value * scale))
+
+    def _proxy_source(self, img=None, scale=1.0):
+        """
+        Returns the original downscaled by the scale, reusing the last one when possible.
+        """
+        if img is not self.source or scale != self.scale:
+            height, width = img.shape[:2]
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = img
+            if ImageStore.is_out_of_core(image):
+                # Skip rows of a disk backed original rather than reading all of it
+                image = ImageStore.sample(image, size[0] * 2, size[1] * 2)
+            self.image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            self.source = img
+            self.scale = scale
+            self.edit_pipeline.clear()
+        return self.image
+
+    def render(self, img_properties=None, img=None, viewport_width=0, viewport_height=0, zoom=1.0):
+        """
+        Renders the edits on a proxy of the original sized for the viewport.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object
+            img (numpy.ndarray): The full resolution original image
+            viewport_width (int): Width of the area the image is shown in
+            viewport_height (int): Height of the area the image is shown in
+            zoom (float): The current zoom scale factor
+
+        Returns:
+            tuple: The rendered proxy and its scale, or (None, 1.0) if a full resolution render is needed
+        """
+        scale = PreviewProxy.proxy_scale(
+            img_properties, img.shape, viewport_width, viewport_height, zoom)
+        if scale >= 1.0:
+            return None, 1.0
+
+        with self._lock:
+            proxy = self._proxy_source(img, scale)
+        return self.render_reduced(img_properties, proxy, img.shape)
+
+    def render_reduced(self, img_properties=None, img=None, shape=None):
+        """
+        Renders the edits on a reduced copy of an image, scaling the edits to match.
+
+        Parameters:
+            img_properties (ImageProperties): The image properties object, measured on the full resolution image
+            img (numpy.ndarray): The reduced image
+            shape (tuple): The shape of the full resolution image
+
+        Returns:
+            tuple: The rendered image and its scale relative to a full resolution render
+        """
+        # The reduced image may be a pixel off from the exact scale after rounding
+        actual_scale = img.shape[1] / shape[1]
+        image_properties = PreviewProxy.scale_properties(
+            img_properties, actual_scale)
+        image = self.edit_pipeline.run(image_properties, img)
+
+        output_width = EditPlanner.output_shape(
+            dataclasses.replace(img_properties), shape)[1]
+        return image, image.shape[1] / output_width
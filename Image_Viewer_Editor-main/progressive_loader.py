@@ -0,0 +1,113 @@
+from image_io import ImageIO
+from image_store import ImageStore
+from render_scheduler import RenderScheduler
+
+
+class ProgressiveLoader:
+    # Files with fewer pixels than this are decoded in full straight away
+    MIN_PIXELS = 1 << 23
+    # Reduced decodes OpenCV supports, largest reduction first
+    REDUCTIONS = (8, 4, 2)
+
+    def __init__(self, widget=None, on_loaded=None):
+        """
+        Opens large images in two steps: a reduced decode that can be shown and edited at once,
+        then the full resolution decode on a worker thread.
+
+        Parameters:
+            widget (tkinter.Widget): Widget whose after() is used to hand the full image back to the Tk thread.
+            on_loaded (callable): Called on the Tk thread with the full resolution image once it is decoded.
+        """
+        self.path = None  # The file being loaded
+        self.on_loaded = on_loaded
+        self.scheduler = RenderScheduler(widget, ProgressiveLoader._decode, self._loaded)
+
+    @staticmethod
+    def _decode(path=None):
+        """
+        Decodes the full resolution image. Runs on the worker thread.
+        """
+        return path, ImageStore.store(ImageIO.read_image(path))
+
+    @staticmethod
+    def reduction(width=0, height=0, viewport_width=0, viewport_height=0):
+        """
+        Returns the largest reduction that still fills the viewport, or 1 if the image should be decoded in full.
+
+        Parameters:
+            width (int): Width of the image
+            height (int): Height of the image
+            viewport_width (int): Width of the area the image is shown in
+            viewport_height (int): Height of the area the image is shown in
+
+        Returns:
+            int: 1, 2, 4 or 8
+        """
+        if width * height < ProgressiveLoader.MIN_PIXELS:
+            return 1
+        for factor in ProgressiveLoader.REDUCTIONS:
+            if width // factor >= viewport_width and height // factor >= viewport_height:
+                return factor
+        return 1
+
+    def load(self, path=None, viewport_width=0, viewport_height=0):
+        """
+        Starts loading an image. Large images are returned reduced while the full resolution
+        decode continues in the background, and on_loaded is called once it is done.
+
+        Parameters:
+            path (str): The path to the file.
+            viewport_width (int): Width of the area the image is shown in
+            viewport_height (int): Height of the area the image is shown in
+
+        Returns:
+            tuple: The image, possibly reduced, and the (height, width) of the full resolution image.
+                The image is None if the file could not be read.
+        """
+        self.path = path
+        # A file that was still loading is no longer wanted
+        self.scheduler.cancel()
+
+        info = ImageIO.read_image_info(path)
+        if info is not None:
+            width, height, is_gray = info
+            factor = ProgressiveLoader.reduction(width, height, viewport_width, viewport_height)
+            image = None
+            if factor > 1:
+                image = ImageIO.read_reduced_image(path, factor, is_gray)
+            if image is not None:
+                # The decoders apply the EXIF orientation, which the header size does not
+                if (image.shape[0] > image.shape[1]) != (height > width):
+                    width, height = height, width
+                self.scheduler.submit(path)
+                return image, (height, width)
+
+        image = ImageStore.store(ImageIO.read_image(path))
+        if image is None:
+            return None, (0, 0)
+        return image, image.shape[:2]
+
+    def is_loading(self):
+        """
+        Returns True while a full resolution decode is running.
+        """
+        return self.scheduler.is_busy()
+
+    def flush(self):
+        """
+        Waits for the full resolution decode and hands the image over straight away.
+        Must be called from the Tk thread.
+        """
+        self.scheduler.flush()
+
+    def _loaded(self, result):
+        """
+        Passes a finished decode on, unless another file was opened meanwhile.
+        """
+        path, image = result
+        if path != self.path:
+            return
+        if image is None:
+            print(f"Error: Could not read {path}")
+            return
+        self.on_loaded(image)
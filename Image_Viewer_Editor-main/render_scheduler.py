@@ -0,0 +1,142 @@
+import threading
+
+
+class RenderScheduler:
+    # How often the Tk thread checks for a finished render, in milliseconds
+    POLL_INTERVAL = 15
+
+    def __init__(self, widget=None, render=None, on_done=None):
+        """
+        Runs render jobs on a worker thread so the Tk mainloop never blocks.
+        Only the newest job is kept: submitting while a job is queued replaces it, and results
+        of jobs that were superseded while running are dropped.
+
+        Parameters:
+            widget (tkinter.Widget): Widget whose after() is used to hand results back to the Tk thread.
+            render (callable): Called on the worker thread with the submitted arguments, returns the result.
+            on_done (callable): Called on the Tk thread with the result of the newest job.
+        """
+        self.widget = widget
+        self.render = render
+        self.on_done = on_done
+
+        self._condition = threading.Condition()
+        self._generation = 0  # Incremented for every submitted job
+        self._pending = None  # (generation, args) of the job waiting to run
+        self._running = False  # True while the worker is rendering
+        self._finished = None  # (generation, result, error) of the last finished job
+        self._polling = False
+
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def submit(self, *args):
+        """
+        Queues a render job, replacing any job that has not started yet.
+
+        Parameters:
+            args: The arguments passed to the render function.
+
+        Returns:
+            None
+        """
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, args)
+            self._condition.notify_all()
+        self._schedule_poll()
+
+    def cancel(self):
+        """
+        Drops the queued job and the result of the running one.
+        """
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+            self._finished = None
+
+    def flush(self):
+        """
+        Waits for the newest job to finish and hands its result over straight away.
+        Must be called from the Tk thread.
+        """
+        self.wait()
+        self._deliver()
+
+    def wait(self):
+        """
+        Waits until no job is queued or running, without handing the result over.
+        Can be called from any thread but the worker's own.
+        """
+        with self._condition:
+            while self._pending is not None or self._running:
+                self._condition.wait()
+
+    def is_busy(self):
+        """
+        Returns True if a job is queued or running.
+        """
+        with self._condition:
+            return self._pending is not None or self._running
+
+    def _work(self):
+        """
+        Worker thread loop, renders the newest job whenever there is one.
+        """
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                generation, args = self._pending
+                self._pending = None
+                self._running = True
+
+            result = None
+            error = None
+            try:
+                result = self.render(*args)
+            except Exception as e:
+                error = e
+
+            with self._condition:
+                self._running = False
+                # Results of jobs submitted before the newest one are stale
+                if generation == self._generation:
+                    self._finished = (generation, result, error)
+                self._condition.notify_all()
+
+    def _schedule_poll(self):
+        """
+        Starts polling for results on the Tk thread if it is not already.
+        """
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        """
+        Runs on the Tk thread, hands over finished results and keeps polling while jobs are outstanding.
+        """
+        self._polling = False
+        self._deliver()
+        if self.is_busy():
+            self._schedule_poll()
+
+    def _deliver(self):
+        """
+        Passes the result of the newest finished job to on_done.
+        """
+        with self._condition:
+            finished = self._finished
+            self._finished = None
+            current = self._generation
+        if finished is None:
+            return
+
+        generation, result, error = finished
+        if generation != current:
+            return
+        if error is not None:
+            print(f"Error rendering image: {error}")
+            return
+        self.on_done(result)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The application modules sit in the folder above, run as scripts rather than installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
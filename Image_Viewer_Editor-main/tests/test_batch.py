@@ -0,0 +1,38 @@
+import os
+import tarfile
+import cv2
+import numpy as np
+import batch
+from batch import BatchRenderer
+
+
+def make_tree(root):
+    image = np.random.default_rng(0).integers(0, 256, (16, 24, 3), dtype=np.uint8)
+    for name in ("a.png", os.path.join("day1", "b.png"), os.path.join("day1", "raw", "c.png")):
+        os.makedirs(os.path.dirname(os.path.join(root, name)), exist_ok=True)
+        cv2.imwrite(os.path.join(root, name), image)
+    with open(os.path.join(root, "day1", "notes.txt"), "w") as notes:
+        notes.write("not an image")
+
+
+def test_directories_are_expanded_recursively(tmp_path):
+    make_tree(str(tmp_path))
+    paths = BatchRenderer.expand_inputs([str(tmp_path)])
+    assert [os.path.relpath(path, str(tmp_path)) for path in paths] == \
+        ["a.png", os.path.join("day1", "b.png"), os.path.join("day1", "raw", "c.png")]
+    assert BatchRenderer.expand_inputs([os.path.join(str(tmp_path), "**", "*.png")]) == sorted(paths)
+
+
+def test_nested_inputs_are_mirrored_in_the_output_directory(tmp_path):
+    make_tree(str(tmp_path / "in"))
+    assert batch.main([str(tmp_path / "in" / "day1"), "-o", str(tmp_path / "out"), "-s", "brightness=0.2", "-j", "1"]) == 0
+    assert os.path.isfile(str(tmp_path / "out" / "b.png"))
+    assert os.path.isfile(str(tmp_path / "out" / "raw" / "c.png"))
+
+
+def test_nested_inputs_are_mirrored_in_the_archive(tmp_path):
+    make_tree(str(tmp_path / "in"))
+    archive = str(tmp_path / "out.tar")
+    assert batch.main([str(tmp_path / "in"), "-a", archive, "-s", "brightness=0.2", "-j", "1"]) == 0
+    with tarfile.open(archive) as written:
+        assert sorted(written.getnames()) == ["a.png", "day1/b.png", "day1/raw/c.png"]
@@ -0,0 +1,68 @@
+import os
+from batch_manifest import BatchManifest
+
+
+def write(path, data):
+    with open(path, "wb") as written:
+        written.write(data)
+
+
+def test_recorded_files_are_done(tmp_path):
+    source, output = str(tmp_path / "in.png"), str(tmp_path / "out.png")
+    write(source, b"input")
+    write(output, b"output")
+    manifest = BatchManifest(str(tmp_path / "manifest.sqlite"))
+    try:
+        fingerprint = manifest.fingerprint(source)
+        assert manifest.is_done(source, "recipe", fingerprint[0]) is None
+
+        manifest.record(source, "recipe", fingerprint, output)
+        assert manifest.is_done(source, "recipe", fingerprint[0]) == os.path.abspath(output)
+        assert manifest.is_done(source, "recipe", fingerprint[0], output) == os.path.abspath(output)
+        assert manifest.is_done(source, "other recipe", fingerprint[0]) is None
+        assert manifest.is_done(source, "recipe", fingerprint[0], str(tmp_path / "elsewhere.png")) is None
+    finally:
+        manifest.close()
+
+
+def test_changed_inputs_and_outputs_are_rendered_again(tmp_path):
+    source, output = str(tmp_path / "in.png"), str(tmp_path / "out.png")
+    write(source, b"input")
+    write(output, b"output")
+    manifest = BatchManifest(str(tmp_path / "manifest.sqlite"))
+    try:
+        manifest.record(source, "recipe", manifest.fingerprint(source), output)
+        write(source, b"new input")
+        assert manifest.is_done(source, "recipe", manifest.fingerprint(source)[0]) is None
+
+        manifest.record(source, "recipe", manifest.fingerprint(source), output)
+        write(output, b"changed output")
+        assert manifest.is_done(source, "recipe", manifest.fingerprint(source)[0]) is None
+    finally:
+        manifest.close()
+
+
+def test_files_edited_in_place_are_not_edited_twice(tmp_path):
+    source = str(tmp_path / "in.png")
+    write(source, b"input")
+    manifest = BatchManifest(str(tmp_path / "manifest.sqlite"))
+    try:
+        fingerprint = manifest.fingerprint(source)
+        write(source, b"edited")
+        manifest.record(source, "recipe", fingerprint, source)
+        # The file now holds the output, which the manifest knows by its contents
+        assert manifest.is_done(source, "recipe", manifest.fingerprint(source)[0]) == os.path.abspath(source)
+    finally:
+        manifest.close()
+
+
+def test_failed_files_are_not_done(tmp_path):
+    source = str(tmp_path / "in.png")
+    write(source, b"input")
+    manifest = BatchManifest(str(tmp_path / "manifest.sqlite"))
+    try:
+        fingerprint = manifest.fingerprint(source)
+        manifest.record(source, "recipe", fingerprint, None, "could not decode")
+        assert manifest.is_done(source, "recipe", fingerprint[0]) is None
+    finally:
+        manifest.close()
@@ -0,0 +1,48 @@
+import os
+import tarfile
+import zipfile
+import cv2
+import numpy as np
+from batch import BatchRenderer
+from batch_output import ArchiveOutput, DirectoryOutput
+
+
+def image():
+    return np.random.default_rng(0).integers(0, 256, (16, 24, 3), dtype=np.uint8)
+
+
+def test_archive_holds_every_image_below_the_input_root(tmp_path):
+    root = str(tmp_path / "in")
+    renderer = BatchRenderer(input_root=root, extension=".png")
+    output = ArchiveOutput(renderer, str(tmp_path / "out.zip"), fsync_every=1)
+    output.open()
+    written = [output.write(os.path.join(root, name), image()) for name in ("a.jpg", os.path.join("day1", "b.jpg"))]
+    output.close()
+
+    assert written == [os.path.join(str(tmp_path / "out.zip"), "a.png"), os.path.join(str(tmp_path / "out.zip"), "day1/b.png")]
+    with zipfile.ZipFile(str(tmp_path / "out.zip")) as archive:
+        assert archive.namelist() == ["a.png", "day1/b.png"]
+        # PNG is lossless, the image comes back as it was written
+        decoded = cv2.imdecode(np.frombuffer(archive.read("day1/b.png"), np.uint8), cv2.IMREAD_COLOR)
+    assert np.array_equal(decoded, image())
+
+
+def test_closing_twice_is_harmless(tmp_path):
+    output = ArchiveOutput(BatchRenderer(extension=".png"), str(tmp_path / "out.tar"))
+    output.open()
+    output.close()
+    output.close()
+    with tarfile.open(str(tmp_path / "out.tar")) as archive:
+        assert archive.getnames() == []
+
+
+def test_directory_output_mirrors_the_input_folders(tmp_path):
+    root = str(tmp_path / "in")
+    renderer = BatchRenderer(output_dir=str(tmp_path / "out"), extension=".png", input_root=root)
+    output = DirectoryOutput(renderer, fsync_every=2)
+    output.open()
+    written = [output.write(os.path.join(root, name), image()) for name in ("a.jpg", os.path.join("x", "y", "b.jpg"))]
+    output.close()
+
+    assert written == [str(tmp_path / "out" / "a.png"), str(tmp_path / "out" / "x" / "y" / "b.png")]
+    assert all(os.path.isfile(path) for path in written)
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from batch import BatchRenderer
+from batch_pool import BatchPool
+from batch_stream import BatchStream
+
+
+def write_inputs(directory, count):
+    paths = []
+    for index in range(count):
+        path = str(directory / f"image{index:02d}.png")
+        cv2.imwrite(path, np.full((8, 8, 3), index, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_every_process_gets_an_image(tmp_path, monkeypatch):
+    processes = 16
+    paths = write_inputs(tmp_path, 40)
+    running = [0]
+    peak = [0]
+    condition = threading.Condition()
+
+    def process_shared(description=None):
+        with condition:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            condition.notify_all()
+            # Hold every job until all processes are busy, or give up after a while
+            condition.wait_for(lambda: peak[0] >= processes, timeout=5)
+            running[0] -= 1
+        _, shape, dtype = description
+        block, output = BatchPool.share_image(np.zeros(shape, dtype=np.dtype(dtype)))
+        block.close()
+        return output
+
+    # Threads stand in for the worker processes, so the jobs in flight can be counted
+    monkeypatch.setattr(BatchPool, "start", lambda self, workers=None: ThreadPoolExecutor(processes))
+    monkeypatch.setattr(BatchPool, "stop", lambda self, pool=None: pool.shutdown(wait=True))
+    monkeypatch.setattr(BatchPool, "_process_shared", staticmethod(process_shared))
+
+    renderer = BatchRenderer(None, str(tmp_path / "out"))
+    results = BatchStream(renderer, processes=processes, queue_size=2).run(paths)
+
+    assert peak[0] == processes
+    assert all(error is None for _, _, error in results)
+
+
+def test_results_keep_input_order(tmp_path):
+    paths = write_inputs(tmp_path, 12)
+    renderer = BatchRenderer(BatchRenderer.load_recipe(None, ["brightness=70"]), str(tmp_path / "out"))
+    results = BatchStream(renderer, processes=1).run(paths)
+
+    assert [path for path, _, _ in results] == paths
+    for path, output_path, error in results:
+        assert error is None
+        assert cv2.imread(output_path).shape == (8, 8, 3)
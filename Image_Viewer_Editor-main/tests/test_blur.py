@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+from blur import Blur
+from edit_planner import EditPlanner
+from image_properties import ImageProperties
+
+
+def smooth_image():
+    noise = np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8)
+    return cv2.resize(noise, (400, 300), interpolation=cv2.INTER_CUBIC)
+
+
+def test_gaussian_matches_opencv():
+    image = smooth_image()
+    for sigma in (2, 8):
+        approximated = Blur.gaussian(image, sigma).astype(int)
+        exact = cv2.GaussianBlur(image, (0, 0), sigma)
+        assert np.abs(approximated - exact).mean() < 1
+
+
+def test_box_sizes_add_up_to_the_variance():
+    sigma = 10
+    sizes = Blur._box_sizes(sigma)
+    assert all(size % 2 == 1 for size in sizes)
+    # A box of width n has the variance (n * n - 1) / 12
+    assert abs(sum((size * size - 1) / 12 for size in sizes) - sigma * sigma) < 0.1 * sigma * sigma
+
+
+def test_downscaled_blur_is_close_to_full_blur():
+    image = smooth_image()
+    kernel_size = 61
+    factor = Blur.preview_factor(kernel_size)
+    preview = Blur.box_downscaled(image, kernel_size, factor)
+
+    assert factor > 1
+    assert preview.shape == image.shape
+    assert np.abs(preview.astype(int) - Blur.box(image, kernel_size)).mean() < 3
+
+
+def test_only_previews_downscale_large_blurs():
+    image_properties = ImageProperties(blur=100, original_image_height=300, original_image_width=400,
+                                       resize_image_height=300, resize_image_width=400)
+    full = EditPlanner.plan(image_properties, (300, 400, 3))
+    preview = EditPlanner.plan(image_properties, (300, 400, 3), preview=True)
+
+    assert [op.name for op in full] == ["blur"]
+    assert [op.name for op in preview] == ["preview_blur"]
+    assert Blur.preview_factor(Blur.kernel_size(10)) == 1
@@ -0,0 +1,49 @@
+import numpy as np
+from color_lut import ColorLUT
+from edit_pipeline import EditPipeline
+from edit_planner import EditPlanner
+from image_properties import ImageProperties
+
+
+def color_properties():
+    return ImageProperties(brightness=60, contrast=70, hue=20, saturation=0.3, original_image_height=64,
+                           original_image_width=64, resize_image_height=64, resize_image_width=64)
+
+
+def test_fused_render_is_close_to_sequential_render():
+    image = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    sequential = EditPipeline().run(color_properties(), image).astype(int)
+    fused = EditPipeline(fuse=True).run(color_properties(), image).astype(int)
+
+    assert np.abs(fused - sequential).max() <= 1
+
+
+def test_fusing_does_not_depend_on_earlier_renders():
+    shape = (4000, 6000, 3)
+    for _ in range(5):
+        assert [op.name for op in EditPlanner.plan(color_properties(), shape, fuse=False)] == \
+            ["brightness_contrast", "hue_saturation"]
+        assert [op.name for op in EditPlanner.plan(color_properties(), shape)] == ["color_lut"]
+    assert EditPlanner.plan(color_properties(), shape).key != EditPlanner.plan(color_properties(), shape, fuse=False).key
+
+
+def test_cube_round_trip(tmp_path):
+    image = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    lut = ColorLUT.compile(EditPlanner.plan(color_properties(), image.shape, fuse=False).ops, color_properties())
+    lut.save_cube(str(tmp_path / "edits.cube"))
+    loaded = ColorLUT.load_cube(str(tmp_path / "edits.cube"))
+
+    assert loaded.title == lut.title
+    # The lattice points lie between whole color values, so they come back within rounding,
+    # and the colors between them are interpolated
+    assert np.abs(loaded.to_lattice().astype(int) - lut.to_lattice()).max() <= 2
+    assert np.abs(loaded.apply(image).astype(int) - lut.apply(image)).mean() < 1.5
+
+
+def test_per_channel_cube_round_trip(tmp_path):
+    table = np.stack([np.arange(256), 255 - np.arange(256), np.arange(256) // 2], axis=-1).astype(np.uint8)
+    ColorLUT(table, title="curves").save_cube(str(tmp_path / "curves.cube"))
+    loaded = ColorLUT.load_cube(str(tmp_path / "curves.cube"))
+
+    assert not loaded.is_3d
+    assert np.abs(loaded.table.astype(int) - table).max() <= 1
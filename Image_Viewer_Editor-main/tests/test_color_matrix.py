@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+from color_matrix import ColorMatrix
+from edit_functions import AllEditFunctions
+from image_properties import ImageProperties
+
+
+def random_image(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (64, 96, 3), dtype=np.uint8)
+
+
+def test_grayscale_matches_opencv():
+    image = random_image()
+    gray = ColorMatrix.grayscale_mix().apply(image)
+
+    assert gray.shape == image.shape[:2]
+    assert np.abs(gray.astype(int) - cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)).max() <= 1
+
+
+def test_grayscale_edit_uses_the_matrix():
+    image = random_image()
+    image_properties = ImageProperties(is_grayscaled=True)
+    gray = AllEditFunctions._apply_grayscale_to_image(image_properties, image)
+
+    assert np.array_equal(gray, ColorMatrix.grayscale_mix().apply(image))
+
+
+def test_channel_mixer_swaps_channels():
+    image = random_image()
+    swapped = ColorMatrix.channel_mixer(blue=(0, 0, 1), red=(1, 0, 0)).apply(image)
+
+    assert np.array_equal(swapped, image[:, :, ::-1])
+
+
+def test_combined_matrix_matches_two_passes():
+    image = random_image()
+    mixer = ColorMatrix.channel_mixer(blue=(0.5, 0.25, 0), green=(0, 0.8, 0), red=(0.1, 0.1, 0.6))
+    combined = mixer.then(ColorMatrix.sepia()).apply(image)
+    separate = ColorMatrix.sepia().apply(mixer.apply(image))
+
+    assert np.abs(combined.astype(int) - separate).max() <= 1
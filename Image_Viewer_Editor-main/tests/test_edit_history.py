@@ -0,0 +1,56 @@
+import dataclasses
+from edit_history import EditHistory
+from image_properties import ImageProperties
+
+
+def record_edits(history, count):
+    image_properties = ImageProperties()
+    recorded = []
+    for index in range(count):
+        # A different field changes on each edit, some edits change several
+        image_properties.brightness = index % 100
+        if index % 3 == 0:
+            image_properties.hue = index
+        if index % 7 == 0:
+            image_properties.is_sepia = not image_properties.is_sepia
+        history.record(image_properties, f"Edit {index}")
+        recorded.append(dataclasses.replace(image_properties))
+    return recorded
+
+
+def fields(image_properties):
+    return tuple(getattr(image_properties, name) for name in EditHistory.FIELDS)
+
+
+def test_values_match_the_recorded_properties_across_keyframes():
+    history = EditHistory()
+    count = EditHistory.KEYFRAME_INTERVAL * 2 + 5
+    recorded = record_edits(history, count)
+
+    assert len(history.keyframes) == 3
+    for index in range(count):
+        assert history.values(index) == fields(recorded[index])
+        assert history.value(index, "hue") == recorded[index].hue
+        assert fields(history.properties(index)) == fields(recorded[index])
+
+
+def test_restore_sets_every_field():
+    history = EditHistory()
+    recorded = record_edits(history, EditHistory.KEYFRAME_INTERVAL + 3)
+    image_properties = ImageProperties(contrast=80, blur=4)
+    history.restore(image_properties, EditHistory.KEYFRAME_INTERVAL - 1)
+    assert fields(image_properties) == fields(recorded[EditHistory.KEYFRAME_INTERVAL - 1])
+
+
+def test_truncating_back_past_a_keyframe_records_from_there():
+    history = EditHistory()
+    recorded = record_edits(history, EditHistory.KEYFRAME_INTERVAL + 3)
+    history.truncate(EditHistory.KEYFRAME_INTERVAL - 2)
+    assert len(history.keyframes) == 1
+
+    image_properties = dataclasses.replace(recorded[EditHistory.KEYFRAME_INTERVAL - 3], contrast=90)
+    for _ in range(4):
+        history.record(image_properties, "Contrast")
+    assert len(history.keyframes) == 2
+    assert history.values(len(history) - 1) == fields(image_properties)
+    assert history.values(EditHistory.KEYFRAME_INTERVAL - 3) == fields(recorded[EditHistory.KEYFRAME_INTERVAL - 3])
@@ -0,0 +1,103 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from image_store import ImageStore
+
+
+class TileExecutor:
+    # Images smaller than this are processed as one piece
+    MIN_PIXELS = 1 << 21
+    # Tiles are never made shorter than this many rows
+    MIN_TILE_ROWS = 32
+    # Number of tiles per worker, more tiles even out uneven work
+    TILES_PER_WORKER = 2
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, workers=None):
+        """
+        Runs an edit on row tiles of an image across a thread pool.
+        OpenCV and most NumPy routines release the GIL, so the tiles run in parallel.
+
+        Parameters:
+            workers (int): Number of threads. Defaults to the number of cores.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    @staticmethod
+    def shared():
+        """
+        Returns the executor shared by all edit pipelines.
+        """
+        with TileExecutor._shared_lock:
+            if TileExecutor._shared is None:
+                TileExecutor._shared = TileExecutor()
+            return TileExecutor._shared
+
+    def _tile_rows(self, height, max_rows=None):
+        """
+        Returns the (start, end) rows of each tile, with no tile taller than max_rows.
+        """
+        tiles = self.workers * TileExecutor.TILES_PER_WORKER
+        rows = max(TileExecutor.MIN_TILE_ROWS, -(-height // tiles))
+        if max_rows is not None:
+            rows = min(rows, max_rows)
+        return [(start, min(start + rows, height)) for start in range(0, height, rows)]
+
+    def run(self, img=None, function=None, halo=0):
+        """
+        Applies the function to the image one tile at a time and stitches the results together.
+        Images over the memory budget are always streamed in bands, into a disk backed output.
+
+        Parameters:
+            img (numpy.ndarray): The image to be edited
+            function (callable): Takes an image tile and returns the edited tile with the same number of rows.
+            halo (int): Number of extra rows each tile needs above and below, for neighborhood edits such as blur.
+
+        Returns:
+            numpy.ndarray: The edited image
+        """
+        image = img
+        height, width = image.shape[:2]
+        max_rows = None
+        if ImageStore.is_out_of_core(image):
+            max_rows = ImageStore.band_rows(image)
+        elif self.workers == 1 or height * width < TileExecutor.MIN_PIXELS:
+            return function(image)
+
+        output = [None]
+        output_lock = threading.Lock()
+
+        def run_tile(start, end):
+            top = max(0, start - halo)
+            bottom = min(height, end + halo)
+            tile = function(image[top:bottom])[start - top:start - top + end - start]
+            with output_lock:
+                # The first finished tile tells us the output channels and type
+                if output[0] is None:
+                    output[0] = ImageStore.empty((height,) + tile.shape[1:], tile.dtype)
+            output[0][start:end] = tile
+
+        futures = [self._pool.submit(run_tile, start, end)
+                   for start, end in self._tile_rows(height, max_rows)]
+        for future in futures:
+            future.result()
+        return output[0]
+
+    def apply(self, op=None, img_properties=None, img=None):
+        """
+        Applies an edit operation in tiles if it supports it, otherwise on the whole image.
+
+        Parameters:
+            op (EditOperation): The operation to apply. op.halo is None for operations that cannot be tiled.
+            img_properties (ImageProperties): The image properties object
+            img (numpy.ndarray): The image to be edited
+
+        Returns:
+            numpy.ndarray: The edited image
+        """
+        if op.halo is None:
+            return op.apply(img_properties, img)
+        return self.run(img, lambda tile: op.apply(img_properties, tile), op.halo)
@@ -0,0 +1,111 @@
+import math
+import cv2
+import numpy as np
+
+
+class Viewport:
+    # Extra pixels rendered around the visible area, so small pans only move the rendered image
+    MARGIN = 128
+    # Screen pixels per image pixel from which pixels are shown as sharp squares
+    PIXEL_ZOOM = 4.0
+
+    @staticmethod
+    def intersect(first=None, second=None):
+        """
+        Returns the overlap of two (left, top, right, bottom) rectangles, or None if they do not overlap.
+        """
+        left = max(first[0], second[0])
+        top = max(first[1], second[1])
+        right = min(first[2], second[2])
+        bottom = min(first[3], second[3])
+        if left >= right or top >= bottom:
+            return None
+        return (left, top, right, bottom)
+
+    @staticmethod
+    def contains(outer=None, inner=None):
+        """
+        Returns True if the inner rectangle lies inside the outer one.
+        """
+        return (outer is not None and outer[0] <= inner[0] and outer[1] <= inner[1]
+                and outer[2] >= inner[2] and outer[3] >= inner[3])
+
+    @staticmethod
+    def render(img=None, display_size=None, rect=None):
+        """
+        Renders one rectangle of the image as it looks when shown at the display size.
+        Only the source pixels under the rectangle are read.
+
+        Parameters:
+            img (numpy.ndarray): The BGR or gray image being displayed
+            display_size (tuple): The (width, height) the whole image is shown at
+            rect (tuple): The (left, top, right, bottom) to render, in displayed pixels
+
+        Returns:
+            numpy.ndarray: The RGB or gray pixels of the rectangle
+        """
+        image = img
+        height, width = image.shape[:2]
+        display_width, display_height = display_size
+        left, top, right, bottom = rect
+        scale_x = width / display_width
+        scale_y = height / display_height
+
+        # Source window under the rectangle, with a pixel of margin for the interpolation
+        source_left = max(0, int(math.floor(left * scale_x)) - 1)
+        source_top = max(0, int(math.floor(top * scale_y)) - 1)
+        source_right = min(width, int(math.ceil(right * scale_x)) + 2)
+        source_bottom = min(height, int(math.ceil(bottom * scale_y)) + 2)
+
+        # Displayed pixel centers onto the source, as cv2.resize maps them
+        matrix = np.array([[scale_x, 0, (left + 0.5) * scale_x - 0.5 - source_left],
+                           [0, scale_y, (top + 0.5) * scale_y - 0.5 - source_top]], dtype=np.float64)
+        interpolation = cv2.INTER_NEAREST if 1 / scale_x >= Viewport.PIXEL_ZOOM else cv2.INTER_LINEAR
+        pixels = cv2.warpAffine(image[source_top:source_bottom, source_left:source_right], matrix,
+                                (right - left, bottom - top),
+                                flags=interpolation | cv2.WARP_INVERSE_MAP,
+                                borderMode=cv2.BORDER_REPLICATE)
+
+        # Convert the image from BGR to RGB, single channel images are shown as they are
+        if pixels.ndim == 3:
+            pixels = cv2.cvtColor(pixels, cv2.COLOR_BGR2RGB)
+        return pixels
+
+    @staticmethod
+    def update(img=None, display_size=None, rect=None, previous=None, previous_rect=None):
+        """
+        Renders a rectangle of the image, copying the part already rendered for the previous
+        rectangle and only rendering the strips that were not.
+
+        Parameters:
+            img (numpy.ndarray): The BGR or gray image being displayed
+            display_size (tuple): The (width, height) the whole image is shown at
+            rect (tuple): The (left, top, right, bottom) to render, in displayed pixels
+            previous (numpy.ndarray): The pixels rendered for the previous rectangle, or None
+            previous_rect (tuple): The previous rectangle, at the same display size
+
+        Returns:
+            numpy.ndarray: The RGB or gray pixels of the rectangle
+        """
+        overlap = None
+        if previous is not None:
+            overlap = Viewport.intersect(rect, previous_rect)
+        if overlap is None:
+            return Viewport.render(img, display_size, rect)
+
+        left, top, right, bottom = rect
+        pixels = np.empty((bottom - top, right - left) + previous.shape[2:], dtype=previous.dtype)
+        pixels[overlap[1] - top:overlap[3] - top, overlap[0] - left:overlap[2] - left] = \
+            previous[overlap[1] - previous_rect[1]:overlap[3] - previous_rect[1],
+                     overlap[0] - previous_rect[0]:overlap[2] - previous_rect[0]]
+
+        # Full width strips above and below the overlap, then the sides next to it
+        strips = [(left, top, right, overlap[1]),
+                  (left, overlap[3], right, bottom),
+                  (left, overlap[1], overlap[0], overlap[3]),
+                  (overlap[2], overlap[1], right, overlap[3])]
+        for strip in strips:
+            if strip[0] < strip[2] and strip[1] < strip[3]:
+                pixels[strip[1] - top:strip[3] - top, strip[0] - left:strip[2] - left] = \
+                    Viewport.render(img, display_size, strip)
+        return pixels